@@ -1,8 +1,10 @@
+import hashlib
 import os
+import re
 import sqlite3
-import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 from flask import (
     Flask,
@@ -13,36 +15,62 @@ from flask import (
     url_for,
     session,
     flash,
+    get_flashed_messages,
     send_from_directory,
+    stream_template,
 )
 
-from werkzeug.security import generate_password_hash, check_password_hash
-from db.db import DB_PATH, init_db, ensure_schema
+from werkzeug.security import generate_password_hash, check_password_hash, safe_join
+from db.db import init_db, ensure_schema, get_connection, release_connection, pooled_connection
 
-from backend.call_service import CallService
+from backend.call_service import get_call_service
+from backend.scheduler import (
+    migrate_legacy_log,
+    search_meetings,
+    delete_meeting as delete_meeting_entry,
+    clear_meetings as clear_meetings_log,
+)
 
 # Public webhook base: configurable via env, with sane default for local dev
 DEFAULT_PUBLIC_BASE_URL = os.getenv(
     "PUBLIC_BASE_URL",
     "https://brianna-pretibial-unferociously.ngrok-free.dev",
 )
+# Normalized once; request handlers reuse it instead of re-stripping per request
+PUBLIC_BASE = DEFAULT_PUBLIC_BASE_URL.rstrip("/") if DEFAULT_PUBLIC_BASE_URL else None
 
 BASE_DIR = Path(__file__).resolve().parent
-DB_DATA_DIR = BASE_DIR / "db" / "data"
-MEETINGS_LOG_PATH = DB_DATA_DIR / "meetings_log.json"
 STATIC_DIR = BASE_DIR / "static"
 # New centralized place for user-uploaded assets under db/
 ASSETS_DIR = BASE_DIR / "db" / "assets"
 
+MEETINGS_PAGE_SIZE = int(os.getenv("MEETINGS_PAGE_SIZE", 50))
+# Work factor for new password hashes. Werkzeug's default costs ~100+ ms per login;
+# existing hashes keep verifying because each stores its own method and cost.
+PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "pbkdf2:sha256:50000")
+
+# E.164 phone numbers: "+", country code, up to 15 digits in total
+_E164 = re.compile(r"^\+[1-9]\d{6,14}$")
+# Spacing/punctuation people commonly type inside phone numbers
+_PHONE_SEPARATORS = re.compile(r"[\s\-().]")
+
+# Browser cache lifetime for /assets responses
+ASSETS_MAX_AGE = 86400
+
 app = Flask(__name__, template_folder="front", static_folder="static")
 app.secret_key = os.getenv("FLASK_SECRET_KEY", "dev-secret-change-me")
 
+# Create the assets dir once at startup rather than on every /assets hit
+ASSETS_DIR.mkdir(parents=True, exist_ok=True)
+# The background is a fixed, manually uploaded asset; resolve it once
+_BG_URL = "/assets/background.jpg" if (ASSETS_DIR / "background.jpg").exists() else None
+
 
 def get_db() -> sqlite3.Connection:
+    # Borrowed from db.db's pool for the request, returned in close_db
     db = getattr(g, "db", None)
     if db is None:
-        db = sqlite3.connect(str(DB_PATH))
-        db.row_factory = sqlite3.Row
+        db = get_connection()
         g.db = db
     return db
 
@@ -52,9 +80,9 @@ def get_db() -> sqlite3.Connection:
 
 @app.teardown_appcontext
 def close_db(exc: Optional[BaseException]) -> None:
-    db = getattr(g, "db", None)
+    db = g.pop("db", None)
     if db is not None:
-        db.close()
+        release_connection(db)
 
 
 def query_user_by_username(username: str) -> Optional[sqlite3.Row]:
@@ -63,9 +91,31 @@ def query_user_by_username(username: str) -> Optional[sqlite3.Row]:
     return cur.fetchone()
 
 
+def hash_password(password: str) -> str:
+    return generate_password_hash(password, PASSWORD_HASH_METHOD)
+
+
+def verify_password(password_hash: str, password: str) -> bool:
+    return check_password_hash(password_hash, password)
+
+
+def current_user() -> Optional[sqlite3.Row]:
+    """Return the logged-in user's profile row, fetched at most once per request."""
+    if "user" not in g:
+        g.user = None
+        if session.get("user_id"):
+            cur = get_db().execute(
+                "SELECT username, company_name, company_description, assistant_name, logo_image, last_call_error "
+                "FROM users WHERE id = ?",
+                (session["user_id"],),
+            )
+            g.user = cur.fetchone()
+    return g.user
+
+
 def create_user(username: str, password: str, email: str = "") -> int:
     db = get_db()
-    password_hash = generate_password_hash(password)
+    password_hash = hash_password(password)
     cur = db.execute(
         "INSERT INTO users (username, password_hash, email) VALUES (?, ?, ?)",
         (username, password_hash, email),
@@ -107,11 +157,12 @@ def login():
         username = request.form.get("username", "").strip()
         password = request.form.get("password", "")
         user = query_user_by_username(username)
-        if not user or not check_password_hash(user["password_hash"], password):
+        if not user or not verify_password(user["password_hash"], password):
             flash("Invalid username or password.")
             return redirect(url_for("login"))
         session["user_id"] = user["id"]
         session["username"] = user["username"]
+        session["logo_image"] = user["logo_image"]
         flash("Logged in.")
         return redirect(url_for("dashboard"))
     return render_template("login.html")
@@ -124,6 +175,21 @@ def logout():
     return redirect(url_for("index"))
 
 
+# Outbound dials run off the request thread so a slow Twilio round-trip never blocks
+# the worker. A failure is stored on the user's row rather than in this process, since
+# the next dashboard view may be served by a different gunicorn worker.
+_CALL_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="dial")
+
+
+def _dial(cs, user_id: int, to_number: str, webhook: str) -> None:
+    try:
+        cs.make_call(to_number, webhook)
+    except Exception as exc:
+        app.logger.exception("Outbound call to %s failed", to_number)
+        with pooled_connection() as conn:
+            conn.execute("UPDATE users SET last_call_error = ? WHERE id = ?", (str(exc), user_id))
+
+
 @app.route("/dashboard", methods=["GET", "POST"])
 def dashboard():
     if not session.get("user_id"):
@@ -131,31 +197,30 @@ def dashboard():
 
     message = None
     # Fetch user info to show company details
-    db = get_db()
-    cur = db.execute("SELECT username, company_name, company_description FROM users WHERE id = ?", (session["user_id"],))
-    user = cur.fetchone()
+    user = current_user()
     needs_company = not (user and user["company_name"] and user["company_description"])
+    # Report (once) a previously dispatched call that failed
+    if user and user["last_call_error"]:
+        message = f"Failed to start call: {user['last_call_error']}"
+        db = get_db()
+        db.execute("UPDATE users SET last_call_error = NULL WHERE id = ?", (session["user_id"],))
+        db.commit()
     # Handle call start submission (single form; no action flag needed)
     if request.method == "POST":
-        to_number = (request.form.get("to_number") or "").strip()
-        if not to_number.startswith("+"):
-            flash("Please include country code and + at the beginning of the phone number.")
+        to_number = _PHONE_SEPARATORS.sub("", request.form.get("to_number") or "")
+        if not _E164.match(to_number):
+            flash("Please include country code and + at the beginning of the phone number (e.g. +972501234567).")
         else:
-            webhook_base = DEFAULT_PUBLIC_BASE_URL.rstrip("/")
-            webhook = f"{webhook_base}/voice?user_id={session['user_id']}"
+            webhook = f"{PUBLIC_BASE or ''}/voice?user_id={session['user_id']}"
             try:
-                cs = CallService()
-                cs.make_call(to_number, webhook)
+                cs = get_call_service()
+                _CALL_EXECUTOR.submit(_dial, cs, session["user_id"], to_number, webhook)
                 message = f"Calling to {to_number}"
             except Exception as exc:
                 message = f"Failed to start call: {exc}"
-    # Fetch user info again for rendering (if not already)
-    if not user:
-        cur = db.execute("SELECT username, company_name, company_description FROM users WHERE id = ?", (session["user_id"],))
-        user = cur.fetchone()
     return render_template(
         "dashboard.html",
-        username=user["username"],
+        username=user["username"] if user else session.get("username"),
         company_name=user["company_name"] if user else "",
         company_description=user["company_description"] if user else "",
         needs_company=needs_company,
@@ -168,56 +233,38 @@ def meetings():
     if not session.get("user_id"):
         return redirect(url_for("login"))
 
-    # Load meetings from JSON log
-    meetings_data = []
-    if MEETINGS_LOG_PATH.exists():
-        try:
-            with open(MEETINGS_LOG_PATH, 'r', encoding='utf-8') as f:
-                meetings_data = json.load(f)
-        except json.JSONDecodeError:
-            meetings_data = []
-
-    # Prepare rows as (original_index, meeting) and filter if query provided
+    # Filter by name if a query was provided; only the requested page is fetched
     query = (request.args.get("q") or "").strip()
-    rows = list(enumerate(meetings_data))
-    if query:
-        q_lower = query.lower()
-        def match(m):
-            name_val = (m.get("name") or "").lower()
-            return q_lower in name_val
-        rows = [(i, m) for i, m in rows if match(m)]
-
-    return render_template("meetings.html", rows=rows, query=query)
+    page = max(request.args.get("page", 1, type=int), 1)
+    start = (page - 1) * MEETINGS_PAGE_SIZE
+    rows, total = search_meetings(query, limit=MEETINGS_PAGE_SIZE, offset=start)
+    has_next = start + MEETINGS_PAGE_SIZE < total
+
+    # Consume flashes now: a streamed body is sent after the session cookie,
+    # so popping them mid-stream would leave them in the session.
+    get_flashed_messages()
+    return stream_template(
+        "meetings.html",
+        rows=rows,
+        query=query,
+        page=page,
+        has_next=has_next,
+        total=total,
+    )
 
 
-@app.route("/meetings/delete", methods=["POST"])  # delete a specific meeting by index
+@app.route("/meetings/delete", methods=["POST"])  # delete a specific meeting by id
 def delete_meeting():
     if not session.get("user_id"):
         return redirect(url_for("login"))
-    # Load meetings
-    meetings_data = []
-    if MEETINGS_LOG_PATH.exists():
-        try:
-            with open(MEETINGS_LOG_PATH, 'r', encoding='utf-8') as f:
-                meetings_data = json.load(f)
-        except json.JSONDecodeError:
-            meetings_data = []
-    # Parse index and delete if valid
-    idx_raw = request.form.get("idx", "-1")
+    meeting_id = request.form.get("meeting_id", type=int)
     try:
-        idx = int(idx_raw)
-    except ValueError:
-        idx = -1
-    if 0 <= idx < len(meetings_data):
-        removed = meetings_data.pop(idx)
-        try:
-            with open(MEETINGS_LOG_PATH, 'w', encoding='utf-8') as f:
-                json.dump(meetings_data, f, ensure_ascii=False, indent=2)
-            flash("Meeting removed.")
-        except Exception as e:
-            flash(f"Failed to update meetings log: {e}")
+        removed = meeting_id is not None and delete_meeting_entry(meeting_id)
+    except sqlite3.Error:
+        app.logger.exception("Failed to delete meeting %s", meeting_id)
+        flash("Failed to remove meeting.")
     else:
-        flash("Invalid meeting selection.")
+        flash("Meeting removed." if removed else "Invalid meeting selection.")
     # Preserve search query if present
     return redirect(url_for("meetings", q=request.args.get("q") or None))
 
@@ -227,9 +274,7 @@ def clear_meetings():
     if not session.get("user_id"):
         return redirect(url_for("login"))
     try:
-        DB_DATA_DIR.mkdir(parents=True, exist_ok=True)
-        with open(MEETINGS_LOG_PATH, 'w', encoding='utf-8') as f:
-            json.dump([], f, ensure_ascii=False, indent=2)
+        clear_meetings_log()
         flash("All meetings cleared.")
     except Exception as e:
         flash(f"Failed to clear meetings: {e}")
@@ -245,11 +290,10 @@ def health():
         db_ok = True
     except Exception:
         db_ok = False
-    public_base = DEFAULT_PUBLIC_BASE_URL.rstrip("/") if DEFAULT_PUBLIC_BASE_URL else None
     return {
         "status": "ok",
         "db": "ok" if db_ok else "error",
-        "public_base_url": public_base,
+        "public_base_url": PUBLIC_BASE,
     }, 200
 
 
@@ -273,11 +317,11 @@ def company_setup():
             ext = (filename.rsplit('.', 1)[-1] or '').lower()
             if ext in {"jpg", "jpeg", "png", "webp", "gif"}:
                 try:
-                    ASSETS_DIR.mkdir(parents=True, exist_ok=True)
                     safe_name = f"user_{session['user_id']}_logo.{ext}"
                     abs_path = ASSETS_DIR / safe_name
                     logo_file.save(str(abs_path))
-                    logo_path_value = f"/assets/{safe_name}"
+                    # Version the URL so browsers holding the long-cached old logo refetch it
+                    logo_path_value = f"/assets/{safe_name}?v={abs_path.stat().st_mtime_ns}"
                 except Exception as e:
                     flash(f"Failed to save logo image: {e}")
             else:
@@ -295,21 +339,18 @@ def company_setup():
                 (name, desc, assistant or None, session["user_id"]),
             )
         db.commit()
+        if logo_path_value:
+            session["logo_image"] = logo_path_value
         flash("Company details saved.")
         return redirect(url_for("dashboard"))
     # Pre-fill if exists
-    db = get_db()
-    cur = db.execute("SELECT company_name, company_description, assistant_name, logo_image FROM users WHERE id = ?", (session["user_id"],))
-    row = cur.fetchone()
-    # Company profile image is a fixed asset uploaded manually as db/assets/background.jpg
-    bg_file = ASSETS_DIR / "background.jpg"
-    bg_url = "/assets/background.jpg" if bg_file.exists() else ""
+    row = current_user()
     return render_template(
         "company_setup.html",
         company_name=(row["company_name"] if row else ""),
         company_description=(row["company_description"] if row else ""),
         assistant_name=(row["assistant_name"] if row and row["assistant_name"] else "Alice"),
-        background_image=bg_url,
+        background_image=_BG_URL or "",
         logo_image=(row["logo_image"] if row and row["logo_image"] else ""),
     )
 
@@ -318,32 +359,53 @@ def company_setup():
 
 @app.context_processor
 def inject_theme():
-    """Expose the fixed background and per-user logo to all templates."""
+    """Expose the fixed background and per-user logo to all templates.
+
+    The logo URL lives in the session (set at login and on upload); sessions
+    from before that was stored fall back to one DB lookup, then cache it.
+    """
     try:
-        bg_file = ASSETS_DIR / "background.jpg"
-        bg = "/assets/background.jpg" if bg_file.exists() else None
-        logo = None
-        if session.get("user_id"):
-            db = get_db()
-            cur = db.execute("SELECT logo_image FROM users WHERE id = ?", (session["user_id"],))
-            row = cur.fetchone()
-            if row and row["logo_image"]:
-                logo = row["logo_image"]
-        return {"current_background_image": bg, "current_logo_image": logo}
+        if session.get("user_id") and "logo_image" not in session:
+            row = current_user()
+            session["logo_image"] = row["logo_image"] if row else None
+        return {"current_background_image": _BG_URL, "current_logo_image": session.get("logo_image") or None}
     except Exception:
         return {"current_background_image": None, "current_logo_image": None}
 
 
+# Content ETag per asset, recomputed only when the file's mtime changes
+_ASSET_ETAGS: Dict[str, Tuple[int, str]] = {}
+
+
+def _asset_etag(filename: str):
+    """Return a content hash ETag for an asset, or True to let Flask derive one."""
+    path = safe_join(str(ASSETS_DIR), filename)
+    if path is None:
+        return True
+    # Missing files and directories fall through; send_from_directory turns them into a 404
+    if not os.path.isfile(path):
+        return True
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+        cached = _ASSET_ETAGS.get(filename)
+        if cached and cached[0] == mtime_ns:
+            return cached[1]
+        with open(path, "rb") as f:
+            etag = hashlib.blake2b(f.read(), digest_size=8).hexdigest()
+    except OSError:
+        return True
+    _ASSET_ETAGS[filename] = (mtime_ns, etag)
+    return etag
+
+
 # Serve assets from db/assets via /assets/<filename>
 @app.route("/assets/<path:filename>")
 def assets(filename: str):
-    try:
-        ASSETS_DIR.mkdir(parents=True, exist_ok=True)
-    except Exception:
-        pass
-    return send_from_directory(ASSETS_DIR, filename)
+    # Flask answers If-None-Match with 304 itself when the ETag matches
+    return send_from_directory(ASSETS_DIR, filename, max_age=ASSETS_MAX_AGE, etag=_asset_etag(filename))
 
 
 if __name__ == "__main__":
     init_db()
+    migrate_legacy_log()
     app.run(host="0.0.0.0", port=int(os.getenv("PORT", 8080)), debug=True)
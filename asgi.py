@@ -0,0 +1,18 @@
+"""ASGI entry point for serving the web app under an ASGI server.
+
+Usage:
+    uvicorn asgi:app --workers 4
+
+The Flask views stay synchronous: asgiref runs each request on its worker
+thread pool, so requests waiting on SQLite or outbound HTTP overlap instead of
+queueing behind each other. Requires the optional ``asgiref`` package.
+"""
+from asgiref.wsgi import WsgiToAsgi
+
+from app import app as flask_app
+from backend.scheduler import migrate_legacy_log
+from db.db import init_db
+
+init_db()
+migrate_legacy_log()
+app = WsgiToAsgi(flask_app)
@@ -1,8 +1,11 @@
 import logging
 import os
+import threading
 from typing import Optional
 
+from requests.adapters import HTTPAdapter
 from twilio.base.exceptions import TwilioRestException
+from twilio.http.http_client import TwilioHttpClient
 from twilio.rest import Client
 
 from backend.config import get_env, ACCOUNT_SID, AUTH_TOKEN, TWILIO_NUMBER
@@ -11,6 +14,13 @@ from backend.config import get_env, ACCOUNT_SID, AUTH_TOKEN, TWILIO_NUMBER
 logger = logging.getLogger("call_service")
 
 
+def _pooled_http_client() -> TwilioHttpClient:
+    """Twilio HTTP client backed by one keep-alive session, so TLS setup is paid once."""
+    http_client = TwilioHttpClient(pool_connections=True)
+    http_client.session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20))
+    return http_client
+
+
 class CallService:
     """Lightweight wrapper around the Twilio Voice API for outbound calls."""
 
@@ -28,7 +38,7 @@ class CallService:
         if not (self.account_sid and self.auth_token and self.from_number):
             raise RuntimeError("Twilio credentials and outbound number must be configured.")
 
-        self.client = Client(self.account_sid, self.auth_token)
+        self.client = Client(self.account_sid, self.auth_token, http_client=_pooled_http_client())
 
     def make_call(self, to_number: str, webhook_url: str) -> str:
         """Create an outbound call and return the Twilio Call SID."""
@@ -53,3 +63,21 @@ class CallService:
 
         logger.info("Call created with sid=%s", call.sid)
         return call.sid
+
+
+_SERVICE: Optional[CallService] = None
+_SERVICE_LOCK = threading.Lock()
+
+
+def get_call_service() -> CallService:
+    """Return the process-wide CallService, creating it on first use.
+
+    Reusing one instance keeps its HTTPS connections to the Twilio API alive
+    between calls instead of building a new client for every dial.
+    """
+    global _SERVICE
+    if _SERVICE is None:
+        with _SERVICE_LOCK:
+            if _SERVICE is None:
+                _SERVICE = CallService()
+    return _SERVICE
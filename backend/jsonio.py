@@ -0,0 +1,35 @@
+"""JSON encoding/decoding helpers.
+
+Prefers orjson (a native parser, several times faster than the stdlib on
+typical payloads) when it is installed, and falls back to the standard
+library otherwise. orjson's decode error subclasses json.JSONDecodeError,
+so callers can keep catching the stdlib exception; likewise its encode error
+subclasses TypeError.
+"""
+from __future__ import annotations
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode a JSON document from bytes or str."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode `obj` as compact UTF-8 JSON bytes (non-ASCII characters kept as-is)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    # Same separators as orjson so the bytes don't depend on which backend ran
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+__all__ = ["dumps", "loads"]
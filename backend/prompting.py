@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+from functools import lru_cache
 from pathlib import Path
-from typing import Iterable, Optional
+from string import Template
+from typing import Iterable, Optional, Tuple
 from backend.scheduler import format_slot  # ensure import after move
 
 # Prefer project-root company_profile.md; fallback to file near this module
@@ -11,10 +13,14 @@ if not COMPANY_PROFILE_PATH.exists():
     COMPANY_PROFILE_PATH = Path(__file__).resolve().parent / "company_profile.md"
 
 
+@lru_cache(maxsize=1)
 def load_company_profile() -> str:
     """
     Load the company profile text from a local markdown file.
     If not found, return a concise default fallback line.
+
+    The file is static at runtime, so the text is read once per process;
+    call ``load_company_profile.cache_clear()`` after editing it.
     """
     try:
         return COMPANY_PROFILE_PATH.read_text(encoding="utf-8").strip()
@@ -32,39 +38,9 @@ def _join_availability_windows(windows: Optional[Iterable[str]]) -> str:
     return ", ".join(w.strip() for w in windows if w and w.strip())
 
 
-def build_system_prompt(
-    assistant_name: str = "Alice",
-    company_name: str = "Jonny AI Company",
-    company_profile: Optional[str] = None,
-    availability_windows: Optional[Iterable[str]] = None,
-    timezone: str = "Asia/Jerusalem",
-) -> str:
-    """
-    Build the system prompt for the outbound calling assistant.
-
-    Parameters
-    ----------
-    assistant_name : str
-        Display name the assistant will use on calls.
-    company_name : str
-        Company name to present to prospects.
-    company_profile : Optional[str]
-        Plaintext/markdown describing the company. If None, loads from company_profile.md.
-    availability_windows : Optional[Iterable[str]]
-        A list of human-readable time windows (e.g., "Mon 17 Nov 10:00–10:30").
-    timezone : str
-        IANA timezone for scheduling (e.g., "Asia/Jerusalem").
-
-    Returns
-    -------
-    str
-        Fully composed system prompt for the LLM.
-    """
-    profile = (company_profile or load_company_profile()).strip()
-    windows_text = _join_availability_windows(availability_windows)
-
-    prompt = f"""
-You are {assistant_name}, the friendly, concise voice of {company_name}.
+# Static prompt scaffolding, parsed once at import; only the $-placeholders vary per call.
+_SYSTEM_PROMPT_TEMPLATE = Template("""
+You are $assistant_name, the friendly, concise voice of $company_name.
 Primary objective: BOOK A MEETING between the prospect and a senior account manager or strategist.
 Every turn should politely move toward that goal.
 
@@ -75,7 +51,7 @@ STYLE:
 - If interrupted, pause, acknowledge, and continue succinctly.
 
 CONTEXT ABOUT COMPANY:
-{profile}
+$profile
 
 OPERATING RULES:
 - Never invent facts beyond the profile above.
@@ -94,11 +70,11 @@ CALL FLOW:
 - If “no time”: offer a callback window; if they share one, capture it and append [[CALLBACK_NEEDED]] with details.
 
 2) MINI-PITCH (2–3 sentences) → INTEREST CHECK
-- Briefly explain what {company_name} does using the profile above (2–3 sentences max).
+- Briefly explain what $company_name does using the profile above (2–3 sentences max).
 - Close with a clear check: “Does this sound relevant to you?”
 
 3) IF INTERESTED → BOOK
-- Propose two specific options that fit (local tz {timezone}): {windows_text}
+- Propose two specific options that fit (local tz $timezone): $windows_text
 - If neither works, ask for a preferred day/time next week.
 - Once chosen, CONFIRM OUT LOUD:
   • Day & date, start time, duration (20–30 min), timezone  
@@ -108,14 +84,14 @@ CALL FLOW:
   • Best email (spell back; confirm)  
     • Do not ask for a phone number — the system records the dialed number automatically.  
 - State brief agenda expectation and thank them.
-- Append [[BOOKED {{\"name\":\"...\",\"email\":\"...\",\"datetime_iso\":\"YYYY-MM-DDTHH:MM\",\"timezone\":\"{timezone}\",\"duration_min\":30,\"notes\":\"...\"}}]]
+- Append [[BOOKED {\"name\":\"...\",\"email\":\"...\",\"datetime_iso\":\"YYYY-MM-DDTHH:MM\",\"timezone\":\"$timezone\",\"duration_min\":30,\"notes\":\"...\"}]]
 
 IMPORTANT BOOKING RULE:
 - You MUST collect BOTH name and email before emitting [[BOOKED {...}]]. If either is missing, politely ask and confirm (spell back emails) before booking.
 - When a time is confirmed, you MUST append the [[BOOKED {...}]] JSON token exactly as shown above as the LAST line of your reply. Never emit [[BOOKED]] without name and email. Do not end the call without adding it.
 
 IF A TIME IS UNAVAILABLE OR REJECTED:
-- Apologize briefly and IMMEDIATELY propose two new valid alternatives within the allowed window (Sun–Thu, 08:00–16:00, tz {timezone}).
+- Apologize briefly and IMMEDIATELY propose two new valid alternatives within the allowed window (Sun–Thu, 08:00–16:00, tz $timezone).
 - Do NOT append [[END_CALL]] at that moment; continue to schedule.
 
 
@@ -133,13 +109,13 @@ IF A TIME IS UNAVAILABLE OR REJECTED:
 - “Not my area”: “Thanks—who owns this internally so I don’t waste your time?” (ask for intro/email)
 
 WRAP-UP TAGS (must end with one when the call ends):
-- [[BOOKED {{...}}]]  — meeting scheduled (use JSON above)
-- [[CALLBACK_NEEDED {{\"when\":\"...\",\"timezone\":\"{timezone}\",\"notes\":\"...\"}}]]
-- [[SEND_INFO {{\"email\":\"...\",\"notes\":\"...\"}}]]
+- [[BOOKED {...}]]  — meeting scheduled (use JSON above)
+- [[CALLBACK_NEEDED {\"when\":\"...\",\"timezone\":\"$timezone\",\"notes\":\"...\"}]]
+- [[SEND_INFO {\"email\":\"...\",\"notes\":\"...\"}]]
 - [[END_CALL]]
 
 DATA HYGIENE:
-- Spell back emails and confirm timezone ({timezone}).
+- Spell back emails and confirm timezone ($timezone).
 - Keep each turn short; one question at a time.
 
 BEHAVIORAL GUARDRAILS:
@@ -147,9 +123,61 @@ BEHAVIORAL GUARDRAILS:
 - If asked something you cannot answer: “Great question—our manager will cover that on the call.”
 
 BEGIN THE CALL NOW.
-    """.strip()
+""")
 
-    return prompt
+
+def build_system_prompt(
+    assistant_name: str = "Alice",
+    company_name: str = "Jonny AI Company",
+    company_profile: Optional[str] = None,
+    availability_windows: Optional[Iterable[str]] = None,
+    timezone: str = "Asia/Jerusalem",
+) -> str:
+    """
+    Build the system prompt for the outbound calling assistant.
+
+    Parameters
+    ----------
+    assistant_name : str
+        Display name the assistant will use on calls.
+    company_name : str
+        Company name to present to prospects.
+    company_profile : Optional[str]
+        Plaintext/markdown describing the company. If None, loads from company_profile.md.
+    availability_windows : Optional[Iterable[str]]
+        A list of human-readable time windows (e.g., "Mon 17 Nov 10:00–10:30").
+    timezone : str
+        IANA timezone for scheduling (e.g., "Asia/Jerusalem").
+
+    Returns
+    -------
+    str
+        Fully composed system prompt for the LLM.
+    """
+    profile = (company_profile or load_company_profile()).strip()
+    windows = tuple(availability_windows) if availability_windows else ()
+    return _render_system_prompt(assistant_name, company_name, profile, windows, timezone)
+
+
+# One entry per distinct company profile; sized so a busy multi-tenant server keeps
+# every active company resident (each prompt is a few KB)
+@lru_cache(maxsize=256)
+def _render_system_prompt(
+    assistant_name: str,
+    company_name: str,
+    profile: str,
+    windows: Tuple[str, ...],
+    timezone: str,
+) -> str:
+    """Substitute the template; memoized so repeat calls with the same inputs are a dict hit."""
+    windows_text = _join_availability_windows(windows)
+    return _SYSTEM_PROMPT_TEMPLATE.substitute(
+        assistant_name=assistant_name,
+        company_name=company_name,
+        profile=profile,
+        windows_text=windows_text,
+        timezone=timezone,
+    ).strip()
 
 
 def build_legacy_system_prompt() -> str:
@@ -1,71 +1,307 @@
 import json
 import logging
-from datetime import datetime, timedelta, time
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
+
+from backend import jsonio
+from db.db import get_connection, init_db, pooled_connection
 
 logger = logging.getLogger(__name__)
 
 # Meeting log stays at project root
 BASE_DIR = Path(__file__).resolve().parent.parent
-# Centralized location for persistent JSON logs
-MEETING_LOG_PATH = BASE_DIR / "db" / "data" / "meetings_log.json"
+# Meetings live in the `meetings` table of db/data/app.db. These are the file logs
+# used before that; whichever exists is imported once and renamed to *.imported.
+# The JSON Lines log holds one meeting per line plus {"op": "delete", "idx": N}
+# tombstones that remove the N-th live meeting at the point they were written.
+MEETING_LOG_PATH = BASE_DIR / "db" / "data" / "meetings_log.jsonl"
+# Oldest format: a single JSON array
+LEGACY_MEETING_LOG_PATH = BASE_DIR / "db" / "data" / "meetings_log.json"
+
+# Meeting fields stored in their own column; everything else goes to `extra`
+MEETING_COLUMNS = ("slot", "call_sid", "name", "prospect_number", "twilio_number", "logged_at")
+_SELECT_MEETINGS = "SELECT id, " + ", ".join(MEETING_COLUMNS) + ", extra FROM meetings"
+_INSERT_MEETING = (
+    "INSERT OR IGNORE INTO meetings (" + ", ".join(MEETING_COLUMNS) + ", extra) "
+    "VALUES (" + ", ".join("?" * (len(MEETING_COLUMNS) + 1)) + ")"
+)
+
+_ready = False
+_READY_LOCK = threading.Lock()
+
+# Bit N set means weekday N (Monday=0 ... Sunday=6) takes meetings: Sunday through Thursday
+ALLOWED_WEEKDAY_MASK = 0b1001111
+# Meeting start hours, 08:00 through 15:00, and their " HH:00" slot-string tails
+_SLOT_HOURS = range(8, 16)
+_HOUR_SUFFIXES = tuple(f" {hour:02d}:00" for hour in _SLOT_HOURS)
+
+
+def _ensure_ready() -> None:
+    """Create the meetings table and import any legacy log, once per process."""
+    global _ready
+    if _ready:
+        return
+    with _READY_LOCK:
+        if not _ready:
+            init_db()
+            migrate_legacy_log()
+            _ready = True
+
+
+def _read_legacy_jsonl() -> List[Dict[str, Any]]:
+    """Replay the JSON Lines log, applying delete tombstones in order."""
+    entries: List[Dict[str, Any]] = []
+    for line in MEETING_LOG_PATH.read_bytes().splitlines():
+        if not line.strip():
+            continue
+        try:
+            record = jsonio.loads(line)
+        except json.JSONDecodeError:
+            logger.warning("Skipping unreadable line in meetings log")
+            continue
+        if not isinstance(record, dict):
+            continue
+        if record.get("op") == "delete":
+            idx = record.get("idx")
+            if isinstance(idx, int) and 0 <= idx < len(entries):
+                entries.pop(idx)
+        else:
+            entries.append(record)
+    return entries
+
+
+def migrate_legacy_log() -> None:
+    """Import the file-based meetings log into the meetings table (one-shot).
+
+    The JSONL log, when present, supersedes the JSON array it was created from.
+    Every legacy file found is renamed afterwards so nothing is imported twice.
+    Requires the table to exist (init_db()).
+
+    A failed import is logged, not raised: the files stay in place for the next
+    start, and _ensure_ready() doesn't retry it on every call in the meantime.
+    """
+    try:
+        _import_legacy_log()
+    except (sqlite3.Error, OSError):
+        logger.exception("Could not import legacy meetings log; retrying on next start")
+
+
+def _import_legacy_log() -> None:
+    if not (MEETING_LOG_PATH.exists() or LEGACY_MEETING_LOG_PATH.exists()):
+        return
+    # Never pooled: gunicorn runs this in the master before forking, and workers
+    # must not inherit an open connection from its pool
+    with closing(get_connection(pooled=False)) as conn, conn:
+        # Workers booting together all get here; the write lock lets one import while
+        # the rest wait, then find the files already renamed and return
+        conn.execute("BEGIN IMMEDIATE")
+        sources = [path for path in (MEETING_LOG_PATH, LEGACY_MEETING_LOG_PATH) if path.exists()]
+        if not sources:
+            return
+        try:
+            if MEETING_LOG_PATH.exists():
+                entries = _read_legacy_jsonl()
+            else:
+                data = jsonio.loads(LEGACY_MEETING_LOG_PATH.read_bytes())
+                entries = [e for e in data if isinstance(e, dict)] if isinstance(data, list) else []
+        except (json.JSONDecodeError, OSError):
+            logger.warning("Could not read legacy meetings log; not migrating.")
+            return
+        rows: List[Tuple[Any, ...]] = []
+        for entry in entries:
+            if not isinstance(entry.get("slot"), str):
+                continue
+            try:
+                rows.append(_to_row(entry))
+            except TypeError:
+                logger.warning("Skipping legacy meeting for slot %s: cannot be stored", entry["slot"])
+        # One executemany in one transaction: a single commit for the whole import
+        imported = conn.executemany(_INSERT_MEETING, rows).rowcount
+        # Renamed before the commit releases the lock, so no waiting worker re-imports
+        for path in sources:
+            try:
+                path.replace(path.with_name(path.name + ".imported"))
+            except FileNotFoundError:
+                pass  # another worker already imported and renamed it
+    # Legacy logs could hold the same slot twice; the unique index keeps the first
+    logger.info("Imported %d of %d legacy meetings into the database", imported, len(entries))
+
+
+def _fits_column(value: Any) -> bool:
+    """True if SQLite can store `value` as-is and hand the same value back."""
+    if isinstance(value, bool):
+        return False  # would come back as 0/1
+    if isinstance(value, int):
+        return -(2**63) <= value < 2**63
+    return value is None or isinstance(value, (str, float))
+
+
+def _to_row(entry: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Encode `entry` as INSERT parameters; raises TypeError if `extra` can't be encoded.
+
+    Booking payloads are whatever JSON the model wrote, so a column field holding
+    anything else (e.g. a dict for `name`) goes to `extra`, where _from_row finds it.
+    """
+    columns = tuple(entry.get(col) if _fits_column(entry.get(col)) else None for col in MEETING_COLUMNS)
+    extra = {
+        k: v for k, v in entry.items() if k != "id" and (k not in MEETING_COLUMNS or not _fits_column(v))
+    }
+    return (*columns, jsonio.dumps(extra).decode("utf-8") if extra else None)
+
+
+def _from_row(row: sqlite3.Row) -> Dict[str, Any]:
+    meeting: Dict[str, Any] = jsonio.loads(row["extra"]) if row["extra"] else {}
+    for col in MEETING_COLUMNS:
+        if row[col] is not None:
+            meeting[col] = row[col]
+    meeting["id"] = row["id"]
+    return meeting
+
+
+def iter_meetings() -> Iterator[Dict[str, Any]]:
+    """Yield meetings in booking order, decoding rows as the cursor streams them.
+
+    For callers that only scan: nothing is materialized up front. The pooled
+    connection is held until the iterator is exhausted or closed.
+    """
+    _ensure_ready()
+    with pooled_connection() as conn:
+        for row in conn.execute(_SELECT_MEETINGS + " ORDER BY id"):
+            yield _from_row(row)
 
 
 def load_meetings() -> List[Dict[str, Any]]:
-    if not MEETING_LOG_PATH.exists():
-        MEETING_LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
-        return []
+    """Return every meeting in booking order; each dict carries its row `id`."""
     try:
-        with MEETING_LOG_PATH.open("r", encoding="utf-8") as handle:
-            data = json.load(handle)
-            if isinstance(data, list):
-                return data
-    except (json.JSONDecodeError, OSError):
-        logger.warning("Could not load meetings log; starting fresh.")
+        return list(iter_meetings())
+    except sqlite3.Error:
+        logger.warning("Could not load meetings; starting fresh.")
     return []
 
 
+def search_meetings(query: str = "", limit: int = 50, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+    """Return one page of meetings whose name contains `query`, plus the total match count."""
+    _ensure_ready()
+    where, params = "", ()
+    if query:
+        pattern = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        # LIKE is case-insensitive for ASCII letters
+        where, params = " WHERE name LIKE ? ESCAPE '\\'", ("%" + pattern + "%",)
+    with pooled_connection() as conn:
+        total = conn.execute("SELECT COUNT(*) FROM meetings" + where, params).fetchone()[0]
+        rows = conn.execute(_SELECT_MEETINGS + where + " ORDER BY id LIMIT ? OFFSET ?", params + (limit, offset))
+        return [_from_row(row) for row in rows], total
+
+
 def write_meetings(entries: List[Dict[str, Any]]) -> None:
+    """Replace every stored meeting with `entries`."""
+    _ensure_ready()
     try:
-        MEETING_LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with MEETING_LOG_PATH.open("w", encoding="utf-8") as handle:
-            json.dump(entries, handle, indent=2, ensure_ascii=False)
-    except OSError:
-        logger.exception("Failed to persist meetings log")
+        with pooled_connection() as conn:
+            conn.execute("DELETE FROM meetings")
+            conn.executemany(_INSERT_MEETING, [_to_row(e) for e in entries])
+    except sqlite3.Error:
+        logger.exception("Failed to persist meetings")
+
+
+def _insert_meeting(entry: Dict[str, Any]) -> bool:
+    """Insert `entry`; False if its slot is already booked."""
+    _ensure_ready()
+    with pooled_connection() as conn:
+        return conn.execute(_INSERT_MEETING, _to_row(entry)).rowcount == 1
 
 
 def append_meeting(entry: Dict[str, Any]) -> None:
-    entries = load_meetings()
-    entries.append(entry)
-    write_meetings(entries)
+    try:
+        if not _insert_meeting(entry):
+            logger.info("Slot %s is already booked; not logging it again", entry.get("slot"))
+    except sqlite3.Error:
+        logger.exception("Failed to persist meeting")
 
 
-def generate_available_slots(booked: Optional[Dict[str, Any]] = None, days: int = 14) -> List[str]:
-    booked_set = set(booked or [])
-    now = datetime.now()
+def delete_meeting(meeting_id: int) -> bool:
+    """Delete the meeting with row id `meeting_id`.
+
+    Returns False if no such meeting exists; raises sqlite3.Error if the
+    database cannot be written.
+    """
+    _ensure_ready()
+    with pooled_connection() as conn:
+        return conn.execute("DELETE FROM meetings WHERE id = ?", (meeting_id,)).rowcount == 1
+
+
+def clear_meetings() -> None:
+    """Delete every meeting. Raises sqlite3.Error if the database cannot be written."""
+    _ensure_ready()
+    with pooled_connection() as conn:
+        conn.execute("DELETE FROM meetings")
+
+
+def generate_available_slots(booked: Optional[Iterable[str]] = None, days: int = 14) -> List[str]:
+    # Slots start on the hour, so flooring "now" to the minute doesn't change the
+    # result and lets repeated calls within the same minute hit the cache
+    now = datetime.now().replace(second=0, microsecond=0)
+    return list(_generate_slots(now, frozenset(booked or ()), days))
+
+
+@lru_cache(maxsize=256)
+def _generate_slots(now: datetime, booked_set: FrozenSet[str], days: int) -> Tuple[str, ...]:
     slots: List[str] = []
+    today = now.date()
     for offset in range(days):
-        day = now + timedelta(days=offset)
-        weekday = day.weekday()  # Monday=0, Sunday=6
-        if weekday not in {6, 0, 1, 2, 3}:  # Sunday (6) through Thursday (3)
+        day = today + timedelta(days=offset)
+        if not (ALLOWED_WEEKDAY_MASK >> day.weekday()) & 1:
             continue
-        for hour in range(8, 16):  # 08:00 through 15:00 start times
-            slot_dt = datetime.combine(day.date(), time(hour, 0))
-            if slot_dt <= now:
+        date_str = day.isoformat()
+        for hour, suffix in zip(_SLOT_HOURS, _HOUR_SUFFIXES):
+            # Same as slot_dt <= now: the slot starts on the hour, now is floored to the minute
+            if (day, hour) <= (today, now.hour):
                 continue
-            slot_str = slot_dt.strftime("%Y-%m-%d %H:%M")
+            slot_str = date_str + suffix
             if slot_str not in booked_set:
                 slots.append(slot_str)
-    return slots
+    return tuple(slots)
 
 
-def format_slot(slot_str: str) -> str:
+def parse_slot(slot_str: str) -> Optional[datetime]:
+    """Parse a canonical "YYYY-MM-DD HH:MM" slot string; None if it has any other shape.
+
+    Slicing a fixed layout is several times faster than strptime, which also
+    accepts non-padded forms like "2026-1-5 9:00" that are never offered as slots.
+    """
+    if (
+        len(slot_str) != 16
+        or not slot_str.isascii()
+        or slot_str[4] != "-"
+        or slot_str[7] != "-"
+        or slot_str[10] != " "
+        or slot_str[13] != ":"
+    ):
+        return None
+    parts = (slot_str[0:4], slot_str[5:7], slot_str[8:10], slot_str[11:13], slot_str[14:16])
+    if not all(part.isdigit() for part in parts):
+        return None
     try:
-        parsed = datetime.strptime(slot_str, "%Y-%m-%d %H:%M")
-        return parsed.strftime("%A, %B %d at %I:%M %p")
-    except ValueError:
-        return slot_str
+        return datetime(*map(int, parts))
+    except ValueError:  # out-of-range month, day, hour or minute
+        return None
+
+
+def format_slot(slot_str: str) -> str:
+    parsed = parse_slot(slot_str)
+    if parsed is None:
+        # Rare non-canonical input: let strptime decide
+        try:
+            parsed = datetime.strptime(slot_str, "%Y-%m-%d %H:%M")
+        except ValueError:
+            return slot_str
+    return parsed.strftime("%A, %B %d at %I:%M %p")
 
 
 def ensure_proposed_slots(session: Dict[str, Any], batch: int = 2) -> List[str]:
@@ -91,10 +327,31 @@ def advance_slot_options(session: Dict[str, Any], step: Optional[int] = None) ->
 
 def register_scheduled_slot(session: Dict[str, Any], slot: str) -> None:
     session["scheduled_slot"] = slot
-    session["available_slots"] = [s for s in session.get("available_slots", []) if s != slot]
+    # Drop the slot in place rather than copying the list; generated slots are unique
+    slots = session.setdefault("available_slots", [])
+    try:
+        slots.remove(slot)
+    except ValueError:
+        pass
     session["proposed_slots"] = []
 
 
+# (epoch second, its ISO string): bookings landing in the same second share one format call
+_last_iso: Tuple[int, str] = (0, "")
+
+
+def _utc_now_iso() -> str:
+    """Return the current UTC time as ISO 8601 at second precision, e.g. 2025-11-12T18:25:22+00:00."""
+    global _last_iso
+    sec = int(time.time())
+    cached = _last_iso
+    if cached[0] != sec:
+        cached = (sec, datetime.fromtimestamp(sec, timezone.utc).isoformat())
+        # Tuple swap is atomic, so concurrent callers never see a torn value
+        _last_iso = cached
+    return cached[1]
+
+
 def log_meeting_if_needed(session: Dict[str, Any], call_sid: str) -> None:
     if session.get("meeting_logged"):
         return
@@ -106,48 +363,95 @@ def log_meeting_if_needed(session: Dict[str, Any], call_sid: str) -> None:
         "slot": slot,
         "prospect_number": session.get("prospect_number"),
         "twilio_number": session.get("twilio_number"),
-        "logged_at": datetime.utcnow().isoformat(),
+        "logged_at": _utc_now_iso(),
     }
     append_meeting(entry)
     session["meeting_logged"] = True
 
 
-def get_booked_slots() -> List[str]:
-    """Return the list of slot strings currently booked in the meetings log."""
-    entries = load_meetings()
-    slots: List[str] = []
-    for e in entries:
-        s = e.get("slot")
-        if isinstance(s, str):
-            slots.append(s)
-    return slots
+def get_booked_slots_set() -> Set[str]:
+    """Return the set of slot strings currently booked."""
+    _ensure_ready()
+    try:
+        with pooled_connection() as conn:
+            return {row[0] for row in conn.execute("SELECT slot FROM meetings")}
+    except sqlite3.Error:
+        logger.warning("Could not load booked slots")
+        return set()
 
 
-def is_slot_available(slot_str: str, days: int = 14) -> bool:
-    """Check whether a given slot string (YYYY-MM-DD HH:MM) is available within the next `days` days
-    and falls inside the allowed window (Sunday-Thursday, 08:00-16:00).
-    """
+def get_booked_slots() -> List[str]:
+    """Return the list of slot strings currently booked, in booking order."""
+    _ensure_ready()
     try:
-        # Validate format
-        parsed = datetime.strptime(slot_str, "%Y-%m-%d %H:%M")
-    except ValueError:
+        with pooled_connection() as conn:
+            return [row[0] for row in conn.execute("SELECT slot FROM meetings ORDER BY id")]
+    except sqlite3.Error:
+        logger.warning("Could not load booked slots")
+        return []
+
+
+def _is_booked(slot_str: str) -> bool:
+    _ensure_ready()
+    with pooled_connection() as conn:
+        # Probes the unique index on slot
+        return conn.execute("SELECT 1 FROM meetings WHERE slot = ?", (slot_str,)).fetchone() is not None
+
+
+def _slot_in_window(slot_str: str, days: int = 14) -> bool:
+    """Apply the booking rules generate_available_slots uses, ignoring existing bookings."""
+    # Validate format: only canonical, on-the-hour strings are ever offered
+    parsed = parse_slot(slot_str)
+    if parsed is None or parsed.minute:
         return False
 
     # Exclude past
-    if parsed <= datetime.now():
+    now = datetime.now()
+    if parsed <= now:
+        return False
+
+    # Check within window days
+    if parsed.date() >= now.date() + timedelta(days=days):
         return False
 
     # Check allowed weekdays: Sunday(6) through Thursday(3)
-    if parsed.weekday() not in {6, 0, 1, 2, 3}:
+    if not (ALLOWED_WEEKDAY_MASK >> parsed.weekday()) & 1:
         return False
 
     # Allowed start hours are 08:00-15:00 (last allowed start at 15:00)
-    if not (8 <= parsed.hour <= 15):
+    return parsed.hour in _SLOT_HOURS
+
+
+def is_slot_available(slot_str: str, days: int = 14) -> bool:
+    """Check whether a given slot string (YYYY-MM-DD HH:MM) is available within the next `days` days
+    and falls inside the allowed window (Sunday-Thursday, 08:00-16:00).
+    """
+    if not _slot_in_window(slot_str, days):
+        return False
+    try:
+        return not _is_booked(slot_str)
+    except sqlite3.Error:
+        logger.exception("Could not check slot %s", slot_str)
         return False
 
-    # Check within window days
-    available = generate_available_slots(booked=get_booked_slots(), days=days)
-    return slot_str in available
+
+def are_slots_available(slots: Iterable[str], days: int = 14) -> FrozenSet[str]:
+    """Return the subset of `slots` that is_slot_available would accept, using one query."""
+    candidates = list(dict.fromkeys(s for s in slots if _slot_in_window(s, days)))
+    if not candidates:
+        return frozenset()
+    _ensure_ready()
+    placeholders = ",".join("?" * len(candidates))
+    try:
+        with pooled_connection() as conn:
+            booked = {
+                row[0]
+                for row in conn.execute(f"SELECT slot FROM meetings WHERE slot IN ({placeholders})", candidates)
+            }
+    except sqlite3.Error:
+        logger.exception("Could not check slots %s", candidates)
+        return frozenset()
+    return frozenset(candidates).difference(booked)
 
 
 def book_slot(entry: Dict[str, Any]) -> bool:
@@ -160,14 +464,18 @@ def book_slot(entry: Dict[str, Any]) -> bool:
     if not isinstance(slot, str):
         return False
 
-    if not is_slot_available(slot):
+    if not _slot_in_window(slot):
         return False
 
-    # Persist meeting with metadata and server timestamp
+    # Persist meeting with metadata and server timestamp. The unique index on slot
+    # rejects a double-booking atomically, so there is no check-then-write race.
     to_append = dict(entry)
-    to_append["logged_at"] = datetime.utcnow().isoformat()
-    append_meeting(to_append)
-    return True
+    to_append["logged_at"] = _utc_now_iso()
+    try:
+        return _insert_meeting(to_append)
+    except sqlite3.Error:
+        logger.exception("Failed to persist meeting")
+        return False
 
 
 def update_meeting(slot: str, call_sid: Optional[str] = None, updates: Optional[Dict[str, Any]] = None) -> bool:
@@ -177,12 +485,29 @@ def update_meeting(slot: str, call_sid: Optional[str] = None, updates: Optional[
     """
     if updates is None:
         return False
-    entries = load_meetings()
-    changed = False
-    for e in entries:
-        if e.get("slot") == slot and (call_sid is None or e.get("call_sid") == call_sid):
-            e.update(updates)
-            changed = True
-    if changed:
-        write_meetings(entries)
-    return changed
+    _ensure_ready()
+    sql, params = _SELECT_MEETINGS + " WHERE slot = ?", (slot,)
+    if call_sid is not None:
+        sql, params = sql + " AND call_sid = ?", params + (call_sid,)
+    assignments = ", ".join(f"{col} = ?" for col in MEETING_COLUMNS + ("extra",))
+    try:
+        if not updates:
+            # Nothing to merge: an existence check, with no write lock taken
+            with pooled_connection() as conn:
+                return conn.execute(sql, params).fetchone() is not None
+        with pooled_connection() as conn:
+            # Take the write lock before reading so the merge can't lose a concurrent update
+            conn.execute("BEGIN IMMEDIATE")
+            # slot is unique, so the index probe yields at most one row
+            row = conn.execute(sql, params).fetchone()
+            if row is None:
+                return False
+            meeting = _from_row(row)
+            merged = {**meeting, **updates}
+            # Skip the write when nothing actually changes
+            if merged != meeting:
+                conn.execute(f"UPDATE meetings SET {assignments} WHERE id = ?", (*_to_row(merged), row["id"]))
+        return True
+    except sqlite3.Error:
+        logger.exception("Failed to persist meetings")
+        return False
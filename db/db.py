@@ -5,9 +5,12 @@ from the Flask application code.
 """
 from __future__ import annotations
 
+from contextlib import closing, contextmanager
+import os
 from pathlib import Path
+import queue
 import sqlite3
-from typing import Iterable
+from typing import Iterable, Iterator
 
 # Project root (parent of this directory)
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -15,9 +18,11 @@ DATA_DIR = BASE_DIR / "db" / "data"
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 DB_PATH = DATA_DIR / "app.db"
 OLD_DB_PATH = BASE_DIR / "app.db"
+# Touched once init_db has dealt with OLD_DB_PATH; later startups skip that check
+_MIGRATED_MARK = DATA_DIR / ".legacy_migrated"
 
 USER_TABLE_DDL = """
-CREATE TABLE users (
+CREATE TABLE IF NOT EXISTS users (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     username TEXT UNIQUE NOT NULL,
     password_hash TEXT NOT NULL,
@@ -30,6 +35,50 @@ CREATE TABLE users (
 )
 """
 
+# Booked meetings. Fields the app queries get their own column; any other
+# metadata captured on the call (email, phone, notes...) is kept as a JSON object
+# in `extra`. The unique index makes double-booking a slot impossible.
+MEETINGS_TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS meetings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    slot TEXT NOT NULL,
+    call_sid TEXT,
+    name TEXT,
+    prospect_number TEXT,
+    twilio_number TEXT,
+    logged_at TEXT,
+    extra TEXT
+)
+"""
+MEETINGS_SLOT_INDEX_DDL = "CREATE UNIQUE INDEX IF NOT EXISTS idx_meetings_slot ON meetings(slot)"
+
+# Every table and index, created in one executescript call and one transaction.
+# users.username is UNIQUE, so SQLite already keeps an index for login lookups.
+SCHEMA_SCRIPT = "BEGIN;\n" + ";\n".join(
+    ddl.strip() for ddl in (USER_TABLE_DDL, MEETINGS_TABLE_DDL, MEETINGS_SLOT_INDEX_DDL)
+) + ";\nCOMMIT;"
+
+# Applied to every connection. journal_mode=WAL persists in the DB file once set,
+# so repeating it on later connections is a cheap no-op.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-20000",  # ~20 MB page cache per connection
+)
+
+# Long-lived connections are reused so SQLite's page cache stays warm and the
+# pragmas above run once per connection rather than once per query.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 8))
+_pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=DB_POOL_SIZE)
+
+# Stored in the DB's user_version once ensure_schema() has brought it up to date.
+# Bump it whenever OPTIONAL_COLUMNS changes.
+SCHEMA_VERSION = 2
+
 # Columns that may be added over time (id/username/password_hash always exist)
 OPTIONAL_COLUMNS = [
     "email",
@@ -38,49 +87,112 @@ OPTIONAL_COLUMNS = [
     "assistant_name",
     "background_image",
     "logo_image",
+    # Why the user's last outbound dial failed, until the dashboard shows it
+    "last_call_error",
 ]
 
 
+def apply_pragmas(conn: sqlite3.Connection) -> None:
+    """Switch a connection to WAL with relaxed fsync and in-memory temp storage."""
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+
+
 def init_db() -> None:
     """Create the database if missing, else ensure schema compatibility."""
     # Migrate legacy DB if present at project root
-    if OLD_DB_PATH.exists() and not DB_PATH.exists():
+    legacy_checked = _MIGRATED_MARK.exists()
+    if not legacy_checked and OLD_DB_PATH.exists() and not DB_PATH.exists():
         try:
             OLD_DB_PATH.replace(DB_PATH)
         except Exception:
             # If move fails, we'll just create a fresh DB at new location
             pass
-    if DB_PATH.exists():
-        ensure_schema()
-        return
-    conn = sqlite3.connect(str(DB_PATH))
-    cur = conn.cursor()
-    cur.execute(USER_TABLE_DDL)
-    conn.commit()
-    conn.close()
+    with closing(sqlite3.connect(str(DB_PATH))) as conn:
+        # Persist WAL mode in the file once, up front
+        apply_pragmas(conn)
+        conn.executescript(SCHEMA_SCRIPT)
+    # Also adds the optional columns USER_TABLE_DDL lacks to a brand-new DB
+    ensure_schema()
+    # Only once DB_PATH is fully set up: DB_PATH now exists, so OLD_DB_PATH
+    # could never be moved into place again anyway
+    if not legacy_checked:
+        _MIGRATED_MARK.touch()
 
 
 def ensure_schema() -> None:
     """Add any missing optional columns to the users table.
 
-    Safe to call on every startup; only applies ALTERs when needed.
+    Safe to call on every startup: a DB already at SCHEMA_VERSION returns after a
+    single PRAGMA read; otherwise all ALTERs and the version bump run in one
+    transaction.
     """
-    conn = sqlite3.connect(str(DB_PATH))
-    cur = conn.cursor()
-    cur.execute("PRAGMA table_info(users)")
-    existing = {row[1] for row in cur.fetchall()}
-    to_add: Iterable[str] = [col for col in OPTIONAL_COLUMNS if col not in existing]
-    for col in to_add:
-        cur.execute(f"ALTER TABLE users ADD COLUMN {col} TEXT")
-    if to_add:
-        conn.commit()
-    conn.close()
-
-
-def get_connection() -> sqlite3.Connection:
-    """Return a raw sqlite3 connection (non-Flask context)."""
-    conn = sqlite3.connect(str(DB_PATH))
+    with closing(sqlite3.connect(str(DB_PATH))) as conn:
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
+        with conn:
+            cur = conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            cur.execute("PRAGMA table_info(users)")
+            existing = {row[1] for row in cur.fetchall()}
+            to_add: Iterable[str] = [col for col in OPTIONAL_COLUMNS if col not in existing]
+            for col in to_add:
+                cur.execute(f"ALTER TABLE users ADD COLUMN {col} TEXT")
+            cur.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(str(DB_PATH), check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    apply_pragmas(conn)
     return conn
 
-__all__ = ["DB_PATH", "init_db", "ensure_schema", "get_connection"]
+
+def get_connection(pooled: bool = True) -> sqlite3.Connection:
+    """Return a sqlite3 connection (non-Flask context).
+
+    Pooled connections should be handed back with release_connection() instead
+    of being closed; pass pooled=False for a private connection to close yourself.
+    """
+    if pooled:
+        try:
+            return _pool.get_nowait()
+        except queue.Empty:
+            pass
+    return _connect()
+
+
+def release_connection(conn: sqlite3.Connection) -> None:
+    """Return a connection from get_connection() to the pool (or close it if full)."""
+    # Never hand a half-finished transaction to the next borrower
+    if conn.in_transaction:
+        conn.rollback()
+    try:
+        _pool.put_nowait(conn)
+    except queue.Full:
+        conn.close()
+
+
+@contextmanager
+def pooled_connection() -> Iterator[sqlite3.Connection]:
+    """Borrow a pooled connection for one transaction.
+
+    Commits when the block succeeds, rolls back if it raises, and returns the
+    connection to the pool either way.
+    """
+    conn = get_connection()
+    try:
+        with conn:
+            yield conn
+    finally:
+        release_connection(conn)
+
+__all__ = [
+    "DB_PATH",
+    "init_db",
+    "ensure_schema",
+    "get_connection",
+    "release_connection",
+    "pooled_connection",
+    "apply_pragmas",
+]
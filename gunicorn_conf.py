@@ -0,0 +1,27 @@
+"""Gunicorn settings for serving the web app in production.
+
+Usage:
+    gunicorn -c gunicorn_conf.py app:app
+
+Every value can be overridden through the environment. Threaded workers are
+used so requests in one process share its pooled SQLite connections.
+"""
+import os
+
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', 8080)}")
+workers = int(os.getenv("GUNICORN_WORKERS", 2 * (os.cpu_count() or 1) + 1))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+keepalive = 5
+# Recycle workers periodically; jitter keeps them from restarting in lockstep
+max_requests = 1000
+max_requests_jitter = 100
+
+
+def on_starting(server):
+    """Create/migrate the database and meetings log once in the master before workers fork."""
+    from backend.scheduler import migrate_legacy_log
+    from db.db import init_db
+
+    init_db()
+    migrate_legacy_log()
@@ -0,0 +1,29 @@
+"""Gunicorn settings for serving the Twilio voice webhooks in production.
+
+Usage:
+    gunicorn -c gunicorn_voice_conf.py voice_server:app
+
+Call state (CALL_SESSIONS) lives in process memory, so every webhook of a call
+must reach the same process: run a single worker and scale with threads, which
+mostly wait on Twilio and OpenAI HTTP calls. Every value can be overridden
+through the environment.
+"""
+import os
+
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', 5000)}")
+workers = 1
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 16))
+keepalive = 5
+# A turn waits on recording download, transcription and GPT; leave headroom
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 60))
+# No max_requests: recycling the worker would drop every call in progress
+
+
+def on_starting(server):
+    """Create/migrate the database and meetings log once in the master before the worker forks."""
+    from backend.scheduler import migrate_legacy_log
+    from db.db import init_db
+
+    init_db()
+    migrate_legacy_log()
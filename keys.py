@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 
 # Twilio credentials (use environment variables if available)
 ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID", "")  # add your Account_Sid
@@ -6,6 +7,7 @@ AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN", "")  # add you auth token
 
 # Phone numbers
 NUMBER_TWILIO = os.getenv("TWILIO_NUMBER", "") # add yout twilio number
+YEHONATAN_NUMBER = os.getenv("YEHONATAN_NUMBER", "")
 
 
 __all__ = [
@@ -16,7 +18,11 @@ __all__ = [
 ]
 
 
+@lru_cache(maxsize=1)
 def using_env_vars():
-    """Return True if both main Twilio creds are set in the environment."""
+    """Return True if both main Twilio creds are set in the environment.
+
+    Cached: the environment doesn't change while a worker is running.
+    """
     return bool(os.getenv("TWILIO_ACCOUNT_SID") and os.getenv("TWILIO_AUTH_TOKEN"))
 
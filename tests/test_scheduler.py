@@ -0,0 +1,94 @@
+import json
+import queue
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from backend import scheduler
+from db import db
+
+
+def _drain_pool() -> None:
+    while True:
+        try:
+            db._pool.get_nowait().close()
+        except queue.Empty:
+            return
+
+
+class SchedulerTestCase(unittest.TestCase):
+    """Runs each test against a fresh database and legacy-log location in a temp dir."""
+
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.data_dir = Path(tmp.name)
+        patches = (
+            mock.patch.object(db, "DB_PATH", self.data_dir / "app.db"),
+            mock.patch.object(db, "OLD_DB_PATH", self.data_dir / "old.db"),
+            mock.patch.object(db, "_MIGRATED_MARK", self.data_dir / ".legacy_migrated"),
+            mock.patch.object(scheduler, "MEETING_LOG_PATH", self.data_dir / "meetings_log.jsonl"),
+            mock.patch.object(scheduler, "LEGACY_MEETING_LOG_PATH", self.data_dir / "meetings_log.json"),
+            mock.patch.object(scheduler, "_ready", False),
+        )
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        # Pooled connections point at whichever DB_PATH they were opened for
+        _drain_pool()
+        self.addCleanup(_drain_pool)
+        self.slots = scheduler.generate_available_slots()[:2]
+
+
+class LegacyLogTests(SchedulerTestCase):
+    def test_dict_valued_name_is_imported(self) -> None:
+        entries = [
+            {"slot": self.slots[0], "call_sid": "CA1", "name": {"first": "A"}},
+            {"slot": self.slots[1], "call_sid": "CA2", "name": "B"},
+        ]
+        scheduler.LEGACY_MEETING_LOG_PATH.write_text(json.dumps(entries))
+        db.init_db()
+        scheduler.migrate_legacy_log()
+
+        meetings = scheduler.load_meetings()
+        self.assertEqual([m["name"] for m in meetings], [{"first": "A"}, "B"])
+        self.assertFalse(scheduler.LEGACY_MEETING_LOG_PATH.exists())
+        self.assertFalse(scheduler.is_slot_available(self.slots[0]))
+
+
+    def test_failed_import_is_not_retried_per_call(self) -> None:
+        scheduler.LEGACY_MEETING_LOG_PATH.write_text(json.dumps([{"slot": self.slots[0]}]))
+        failure = sqlite3.OperationalError("database is locked")
+        with mock.patch.object(scheduler, "_import_legacy_log", side_effect=failure) as do_import:
+            with self.assertLogs(scheduler.logger, "ERROR") as logs:
+                self.assertTrue(scheduler.is_slot_available(self.slots[1]))
+                self.assertTrue(scheduler.book_slot({"slot": self.slots[1], "name": "B"}))
+                self.assertFalse(scheduler.is_slot_available(self.slots[1]))
+
+        do_import.assert_called_once()
+        self.assertEqual(len(logs.records), 1)
+        self.assertTrue(scheduler.LEGACY_MEETING_LOG_PATH.exists())
+
+
+class BookSlotTests(SchedulerTestCase):
+    def test_list_valued_field_is_booked(self) -> None:
+        self.assertTrue(scheduler.book_slot({"slot": self.slots[0], "name": ["A", "B"], "call_sid": "CA1"}))
+
+        (meeting,) = scheduler.load_meetings()
+        self.assertEqual(meeting["name"], ["A", "B"])
+        self.assertEqual(meeting["call_sid"], "CA1")
+        self.assertFalse(scheduler.book_slot({"slot": self.slots[0], "name": "C"}))
+
+    def test_update_replaces_non_scalar_value(self) -> None:
+        scheduler.book_slot({"slot": self.slots[0], "name": {"first": "A"}, "call_sid": "CA1"})
+        self.assertTrue(scheduler.update_meeting(self.slots[0], "CA1", {"name": "A B"}))
+
+        (meeting,) = scheduler.load_meetings()
+        self.assertEqual(meeting["name"], "A B")
+        self.assertEqual(scheduler.search_meetings("A B")[1], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
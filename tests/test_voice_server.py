@@ -0,0 +1,24 @@
+import os
+import unittest
+
+# voice_server refuses to import without these; nothing here calls OpenAI or Twilio
+for _name, _value in (("OPENAI_API_KEY", "test"), ("TWILIO_ACCOUNT_SID", "ACtest"), ("TWILIO_AUTH_TOKEN", "test")):
+    os.environ.setdefault(_name, _value)
+
+import voice_server  # noqa: E402
+
+
+class GuessSlotTests(unittest.TestCase):
+    def test_date_component_is_not_an_ampm_hour(self) -> None:
+        # "18 am" belongs to the date, so there is no time to pair with "sunday"
+        self.assertEqual(voice_server._guess_slot_from_text("2025-11-18 am sunday 12"), (None, None))
+
+    def test_weekday_with_ampm_hour(self) -> None:
+        slot, email = voice_server._guess_slot_from_text("sunday 3 pm works, a@b.io")
+        self.assertEqual(voice_server.parse_slot(slot).weekday(), 6)
+        self.assertTrue(slot.endswith(" 15:00"))
+        self.assertEqual(email, "a@b.io")
+
+
+if __name__ == "__main__":
+    unittest.main()
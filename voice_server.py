@@ -1,29 +1,38 @@
+import io
 import logging
 import os
-import tempfile
-from pathlib import Path
-from typing import Any, Dict, List, Optional
+import threading
+import time
+from functools import lru_cache, partial
+from itertools import islice
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, BinaryIO, Callable, Deque, Dict, List, Optional, Sequence, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
 from flask import Flask, Response, request, url_for
-import sqlite3
-from openai import OpenAI
 from twilio.twiml.voice_response import VoiceResponse
 
 from backend.config import get_env, require, diagnostics, ACCOUNT_SID, AUTH_TOKEN
+from backend import jsonio
 from backend.prompting import build_system_prompt
 import re
-import json
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from backend.scheduler import (
     generate_available_slots,
-    get_booked_slots,
+    get_booked_slots_set,
     book_slot,
     register_scheduled_slot,
     is_slot_available,
+    are_slots_available,
+    parse_slot,
 )
 from backend.scheduler import update_meeting
+
+if TYPE_CHECKING:
+    from openai import OpenAI
 # Company email notifications removed per product decision; keep import removed.
 
 
@@ -38,7 +47,14 @@ if not ok:
     raise RuntimeError("Missing required environment variables for OpenAI.")
 openai_api_key = get_env("OPENAI_API_KEY")
 
-client = OpenAI(api_key=openai_api_key)
+
+@lru_cache(maxsize=1)
+def _openai_client() -> "OpenAI":
+    """Create the OpenAI client on first use; importing the SDK alone adds ~0.5s to worker boot."""
+    from openai import OpenAI
+
+    return OpenAI(api_key=openai_api_key)
+
 
 twilio_account_sid = ACCOUNT_SID
 twilio_auth_token = AUTH_TOKEN
@@ -54,140 +70,395 @@ if (
     )
     raise RuntimeError("Twilio credentials must be configured via env or keys.py.")
 
+# One keep-alive session for recording downloads, so each turn reuses the TLS connection
+# to Twilio's media host instead of handshaking again
+_twilio_http = requests.Session()
+_twilio_http.auth = (twilio_account_sid, twilio_auth_token)
+_twilio_http.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=32))
+
 
 TWILIO_VOICE = "alice"
 TWILIO_LANGUAGE = "en-US"
 MINIMUM_SPEECH_CONFIDENCE = 0.4
+# Conversation turns kept for GPT besides the system prompt; older ones fall off
+MAX_HISTORY_TURNS = 24
 PUBLIC_BASE_URL = os.getenv(
     "PUBLIC_BASE_URL",
     "https://brianna-pretibial-unferociously.ngrok-free.dev",
 )
-CALL_SESSIONS: Dict[str, Dict[str, Any]] = {}
-from db.db import DB_PATH
+CALL_SESSION_MAX = int(os.getenv("CALL_SESSION_MAX", 10_000))
+CALL_SESSION_TTL = float(os.getenv("CALL_SESSION_TTL", 3600))
+
+
+class _SessionStore:
+    """Call SID -> session map bounded by size (LRU) and idle time (TTL).
+
+    Calls that drop without an [[END_CALL]] would otherwise keep their history forever.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._items: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float) -> None:
+        # Entries are kept in last-touched order, so expired ones are at the front.
+        while self._items:
+            sid, (_, touched) = next(iter(self._items.items()))
+            if now - touched < self.ttl:
+                break
+            del self._items[sid]
+
+    def _touch(self, call_sid: str, now: float) -> Optional[Dict[str, Any]]:
+        item = self._items.get(call_sid)
+        if item is None:
+            return None
+        self._items[call_sid] = (item[0], now)
+        self._items.move_to_end(call_sid)
+        return item[0]
+
+    def get_or_create(self, call_sid: str, factory: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            existing = self._touch(call_sid, now)
+            if existing is not None:
+                return existing
+        created = factory()
+        with self._lock:
+            # Another request for the same call may have won the race.
+            existing = self._touch(call_sid, now)
+            if existing is not None:
+                return existing
+            self._items[call_sid] = (created, now)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+            return created
+
+    def get(self, call_sid: str, default: Any = None) -> Any:
+        with self._lock:
+            session = self._touch(call_sid, time.monotonic())
+        return default if session is None else session
+
+    def __getitem__(self, call_sid: str) -> Dict[str, Any]:
+        session = self.get(call_sid)
+        if session is None:
+            raise KeyError(call_sid)
+        return session
+
+    def __contains__(self, call_sid: object) -> bool:
+        with self._lock:
+            return call_sid in self._items
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def pop(self, call_sid: str, default: Any = None) -> Any:
+        with self._lock:
+            item = self._items.pop(call_sid, None)
+        return default if item is None else item[0]
+
+
+CALL_SESSIONS = _SessionStore(CALL_SESSION_MAX, CALL_SESSION_TTL)
+
+# Every new session used to recompute the open slots from the meetings table. The list
+# only changes when a booking lands or the clock passes an hour, so sessions share one
+# copy keyed on BOOKED_VERSION (bumped by this process's booking attempts) and the
+# current hour. SLOTS_CACHE_TTL bounds staleness from other workers and the web app.
+SLOTS_CACHE_TTL = float(os.getenv("SLOTS_CACHE_TTL", 60))
+BOOKED_VERSION = 0
+_slots_cache: Dict[str, Any] = {"key": None, "at": 0.0, "slots": []}
+_slots_lock = threading.Lock()
+
+from db.db import pooled_connection
+
+# Company profile rarely changes mid-campaign; serve repeat calls from memory
+# and re-read from SQLite at most once per COMPANY_CONTEXT_TTL seconds.
+COMPANY_CONTEXT_TTL = float(os.getenv("COMPANY_CONTEXT_TTL", 60))
+_COMPANY_CONTEXT_SQL = "SELECT company_name, company_description, assistant_name FROM users WHERE id = ?"
+_ctx_cache: Dict[str, Tuple[Dict[str, Optional[str]], float]] = {}
+_ctx_lock = threading.Lock()
+
+# Patterns used on every turn, compiled once at import time.
+_BOOKED_RE = re.compile(r"\[\[BOOKED\s*(\{.*?\})\s*\]\]", re.DOTALL)
+# English "my name is X" / "i am X" and Hebrew "קוראים לי X" / "שמי X" in one pass.
+_NAME_RE = re.compile(
+    r"\bmy name is\s+(?P<en1>[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\b"
+    r"|\bi am\s+(?P<en2>[A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\b"
+    r"|(?:קוראים לי|שמי)\s+(?P<he>[A-Za-zא-ת]+)",
+    re.IGNORECASE,
+)
+_ISO_STRICT_RE = re.compile(r"(\d{4}-\d{2}-\d{2})[T\s](\d{2}:\d{2})")
+_ISO_LOOSE_RE = re.compile(r"(\d{4}-\d{2}-\d{2}).*(\d{2}:\d{2})")
+# Everything the natural-language booking fallback looks for, in one scan. Alternatives
+# are ordered so the first hit of each kind matches what separate searches found
+# (HH:MM before "H:MM pm"), except that text already claimed by a longer token is
+# never re-read: nothing inside an email ("tuesday.team@..."), and no date component
+# as an am/pm hour ("2025-11-18 am" is a date, not 18:00).
+_FALLBACK_RE = re.compile(
+    r"(?P<email>[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,})"
+    r"|(?P<date>\d{4}-\d{2}-\d{2})(?:(?-i:[T\s])(?P<iso_time>\d{1,2}:\d{2}))?"
+    r"|\b(?P<day>monday|tuesday|wednesday|thursday|sunday)\b"
+    r"|\b(?P<hhmm>\d{1,2}:\d{2})\b"
+    r"|\b(?P<ampm_h>\d{1,2})(?::(?P<ampm_m>\d{2}))?\s*(?P<ampm>am|pm)\b"
+    r"|\b(?P<noon>noon|midday)\b"
+    r"|\b(?P<midnight>midnight)\b",
+    re.IGNORECASE,
+)
+# Every slot _FALLBACK_RE can yield needs a digit or noon/midday/midnight somewhere
+_FAST_TOKEN_RE = re.compile(r"\d|noon|midday|midnight", re.IGNORECASE)
+_WEEKDAY_NUMBERS = {"monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3, "sunday": 6}
+_NON_WORD_RE = re.compile(r"\W+")
+
+# Low-confidence turns draft a reply from Twilio's SpeechResult while Whisper
+# transcribes the recording, so the two OpenAI round-trips overlap.
+_REPLY_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("SPECULATIVE_REPLY_WORKERS", 8)),
+    thread_name_prefix="speculative-reply",
+)
 
 
-def _extract_name_from_history(history: List[Dict[str, str]]) -> Optional[str]:
+def _extract_name_from_history(history: Sequence[Dict[str, str]]) -> Optional[str]:
     """Try to extract a prospect name from recent user turns (English/Hebrew heuristics)."""
     if not history:
         return None
-    import re as _re
     # Scan last few user messages
-    for msg in reversed(history[-8:]):
+    for msg in islice(reversed(history), 8):
         if msg.get("role") != "user":
             continue
         text = (msg.get("content") or "").strip()
         if not text:
             continue
-        # English patterns
-        m = _re.search(r"\bmy name is\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\b", text, _re.IGNORECASE)
+        m = _NAME_RE.search(text)
         if m:
-            return m.group(1)
-        m = _re.search(r"\bi am\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\b", text, _re.IGNORECASE)
-        if m:
-            return m.group(1)
-        # Hebrew patterns (basic): "קוראים לי X" or "שמי X"
-        m = _re.search(r"(?:קוראים לי|שמי)\s+([A-Za-zא-ת]+)", text)
-        if m:
-            return m.group(1)
+            return m.group("en1") or m.group("en2") or m.group("he")
     return None
 
 
+def _normalize_iso(dt_raw: str) -> Optional[str]:
+    """Normalize several ISO-like datetime strings into 'YYYY-MM-DD HH:MM'.
+
+    Examples supported:
+    - 2025-11-18T12:00
+    - 2025-11-18T12:00:00
+    - 2025-11-18T12:00:00Z
+    - 2025-11-18T12:00:00+02:00
+    - 2025-11-18 12:00
+    The wall-clock time is kept as written; any UTC offset is dropped.
+    Returns None if it cannot parse a date+hour:minute pair.
+    """
+    if not dt_raw or not isinstance(dt_raw, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(dt_raw.replace("Z", "+00:00"))
+    except ValueError:
+        parsed = None
+    # A bare date parses as midnight, but it names no meeting time
+    if parsed is not None and len(dt_raw) > 10:
+        return parsed.strftime("%Y-%m-%d %H:%M")
+
+    # Not strict ISO: find YYYY-MM-DD, T or space, HH:MM anywhere in the text
+    m = _ISO_STRICT_RE.search(dt_raw)
+    if m:
+        return f"{m.group(1)} {m.group(2)}"
+    # fallback: a date followed somewhere later by a time
+    m2 = _ISO_LOOSE_RE.search(dt_raw)
+    if m2:
+        return f"{m2.group(1)} {m2.group(2)}"
+    return None
+
+
+def _guess_slot_from_text(text: str) -> Tuple[Optional[str], Optional[str]]:
+    """Infer a 'YYYY-MM-DD HH:MM' slot and an email address from a free-text reply.
+
+    Prefers an ISO-like date+time, then a date plus a separate HH:MM, then an English
+    weekday name plus HH:MM, "3 pm", noon or midnight within the next two weeks.
+    """
+    if not _FAST_TOKEN_RE.search(text):
+        return None, None
+    tokens: Dict[str, "re.Match[str]"] = {}
+    for m in _FALLBACK_RE.finditer(text):
+        # lastgroup is the kind of token; "iso_time" marks a date with a time attached
+        tokens.setdefault(m.lastgroup, m)
+    email = tokens["email"].group("email") if "email" in tokens else None
+
+    iso = tokens.get("iso_time")
+    if iso or ("date" in tokens and "hhmm" in tokens):
+        date_part = (iso or tokens["date"]).group("date")
+        time_part = iso.group("iso_time") if iso else tokens["hhmm"].group("hhmm")
+        # zero-pad hour if needed
+        if len(time_part.split(":")[0]) == 1:
+            time_part = f"0{time_part}"
+        return f"{date_part} {time_part}", email
+
+    day = tokens.get("day")
+    if not day:
+        return None, email
+    if "hhmm" in tokens:
+        hour_min = tokens["hhmm"].group("hhmm")
+        if len(hour_min.split(":")[0]) == 1:
+            hour_min = f"0{hour_min}"
+    elif "ampm" in tokens:
+        time_ampm = tokens["ampm"]
+        h = int(time_ampm.group("ampm_h"))
+        m = int(time_ampm.group("ampm_m") or 0)
+        ampm = time_ampm.group("ampm").lower()
+        if ampm == "pm" and h != 12:
+            h += 12
+        if ampm == "am" and h == 12:
+            h = 0
+        hour_min = f"{h:02d}:{m:02d}"
+    elif "noon" in tokens:
+        hour_min = "12:00"
+    elif "midnight" in tokens:
+        hour_min = "00:00"
+    else:
+        return None, email
+
+    target_wd = _WEEKDAY_NUMBERS[day.group("day").lower()]
+    hh, mm = map(int, hour_min.split(":"))
+    now = datetime.now()
+    for delta in range(0, 14):
+        candidate = now + timedelta(days=delta)
+        if candidate.weekday() == target_wd:
+            candidate_dt = candidate.replace(hour=hh, minute=mm, second=0, microsecond=0)
+            if candidate_dt <= now:
+                continue
+            return candidate_dt.strftime("%Y-%m-%d %H:%M"), email
+    return None, email
+
+
 def _adjust_slot_to_future_within_window(slot_str: str, days: int = 14) -> Optional[str]:
     """If slot_str is in the past, try to find the next occurrence of the same
     weekday and time within the next `days` that is available and valid.
     Returns a corrected slot string or None if no suitable future slot found.
     """
-    from datetime import datetime, timedelta
-    try:
-        original = datetime.strptime(slot_str, "%Y-%m-%d %H:%M")
-    except ValueError:
-        return None
+    original = parse_slot(slot_str)
+    if original is None:
+        # Rare non-canonical input such as "2026-1-5 9:00": let strptime decide
+        try:
+            original = datetime.strptime(slot_str, "%Y-%m-%d %H:%M")
+        except ValueError:
+            return None
     now = datetime.now()
-    # If already in future and available, nothing to adjust
-    if original > now and is_slot_available(slot_str):
-        return slot_str
-    # Try next occurrences within the window
+    # Keep the original if it is still ahead of us, otherwise try the next occurrences
+    # within the window; all candidates are checked against the meetings table at once
+    candidates = [slot_str] if original > now else []
     target_wd = original.weekday()
     target_hm = (original.hour, original.minute)
-    for delta in range(1, days + 1):
-        candidate = now + timedelta(days=delta)
-        if candidate.weekday() != target_wd:
-            continue
-        candidate = candidate.replace(hour=target_hm[0], minute=target_hm[1], second=0, microsecond=0)
-        cand_str = candidate.strftime("%Y-%m-%d %H:%M")
-        if is_slot_available(cand_str):
-            return cand_str
-    return None
+    # Same weekday next occurs 1-7 days out, then every 7 days after that
+    first = (target_wd - now.weekday()) % 7 or 7
+    for delta in range(first, days + 1, 7):
+        candidate = (now + timedelta(days=delta)).replace(hour=target_hm[0], minute=target_hm[1], second=0, microsecond=0)
+        candidates.append(candidate.strftime("%Y-%m-%d %H:%M"))
+    available = are_slots_available(candidates)
+    return next((c for c in candidates if c in available), None)
+
+
+def _cached_available_slots() -> List[str]:
+    """Return a fresh list of open slots, recomputed only when the cache key changes."""
+    now = time.monotonic()
+    with _slots_lock:
+        key = (BOOKED_VERSION, datetime.now().replace(minute=0, second=0, microsecond=0))
+        if _slots_cache["key"] == key and now - _slots_cache["at"] < SLOTS_CACHE_TTL:
+            return list(_slots_cache["slots"])
+    slots = generate_available_slots(booked=get_booked_slots_set())
+    with _slots_lock:
+        _slots_cache.update(key=key, at=now, slots=slots)
+    # Sessions mutate their list (register_scheduled_slot), so never hand out the cached one
+    return list(slots)
+
+
+def _bump_booked_version() -> None:
+    global BOOKED_VERSION
+    with _slots_lock:
+        BOOKED_VERSION += 1
 
 
 def get_session(call_sid: str) -> Dict[str, Any]:
     """Return session container with chat history and conversation stage."""
-    if call_sid not in CALL_SESSIONS:
-        # Initialize empty history; we'll inject a tailored system prompt in /voice based on user context.
-        CALL_SESSIONS[call_sid] = {"history": []}
+
+    def _new_session() -> Dict[str, Any]:
+        # Start with no system prompt; /voice sets one based on user context. Turns are a
+        # rolling window so long calls drop their oldest exchanges without list rebuilds.
+        session: Dict[str, Any] = {"system": None, "turns": deque(maxlen=MAX_HISTORY_TURNS)}
         # Pre-populate available slots from the meeting log
         try:
-            CALL_SESSIONS[call_sid]["available_slots"] = generate_available_slots(booked=get_booked_slots())
+            session["available_slots"] = _cached_available_slots()
         except Exception:
             logger.exception("Failed to initialize available_slots for session %s", call_sid)
-    return CALL_SESSIONS[call_sid]
+        return session
+
+    return CALL_SESSIONS.get_or_create(call_sid, _new_session)
 
 
 def _load_company_context(user_id: Optional[str]) -> Dict[str, Optional[str]]:
-    """Load company_name and company_description for a given user id from the shared SQLite DB."""
+    """Load company_name and company_description for a given user id from the shared SQLite DB.
+
+    Results are cached per user id for COMPANY_CONTEXT_TTL seconds; callers get a copy.
+    """
     if not user_id:
         return {"company_name": None, "company_description": None}
+    now = time.monotonic()
+    with _ctx_lock:
+        cached = _ctx_cache.get(user_id)
+    if cached and now - cached[1] < COMPANY_CONTEXT_TTL:
+        return dict(cached[0])
     try:
-        conn = sqlite3.connect(str(DB_PATH))
-        cur = conn.execute("SELECT company_name, company_description, assistant_name FROM users WHERE id = ?", (user_id,))
-        row = cur.fetchone()
-        conn.close()
+        with pooled_connection() as conn:
+            row = conn.execute(_COMPANY_CONTEXT_SQL, (user_id,)).fetchone()
         if row:
-            return {"company_name": row[0], "company_description": row[1], "assistant_name": row[2]}
+            ctx = {"company_name": row[0], "company_description": row[1], "assistant_name": row[2]}
+            with _ctx_lock:
+                _ctx_cache[user_id] = (ctx, now)
+            return dict(ctx)
     except Exception:
         logger.exception("Failed to load company context for user_id=%s", user_id)
     return {"company_name": None, "company_description": None, "assistant_name": None}
 
 
+def _finalize_meeting(slot: str, call_sid: str) -> None:
+    """Touch the booked meeting record; runs after the TwiML reply has been sent."""
+    try:
+        update_meeting(slot, call_sid=call_sid, updates={})
+    except Exception:
+        logger.exception("Failed to finalize meeting record for slot %s", slot)
+
+
 def cleanup_conversation(call_sid: str) -> None:
     """Drop conversation state once a call is complete."""
     CALL_SESSIONS.pop(call_sid, None)
 
 
-def download_recording(url: str, suffix: str = ".mp3") -> Path:
-    """Fetch the Twilio recording and persist it to a temporary file."""
+def download_recording(url: str, suffix: str = ".mp3") -> io.BytesIO:
+    """Fetch the Twilio recording into memory, named so the upload keeps its format."""
     if not url:
         raise ValueError("RecordingUrl was missing from Twilio payload")
 
-    response = requests.get(
-        f"{url}{suffix}",
-        timeout=30,
-        auth=(twilio_account_sid, twilio_auth_token),
-    )
+    response = _twilio_http.get(f"{url}{suffix}", timeout=30)
     response.raise_for_status()
 
-    tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
-    tmp_path = Path(tmp_file.name)
-    tmp_file.write(response.content)
-    tmp_file.close()
-    return tmp_path
+    audio = io.BytesIO(response.content)
+    audio.name = f"recording{suffix}"
+    return audio
 
 
-def transcribe_audio(path: Path) -> str:
+def transcribe_audio(audio: BinaryIO) -> str:
     """Send audio to OpenAI Whisper for transcription."""
-    with path.open("rb") as audio_file:
-        transcript = client.audio.transcriptions.create(
-            model="gpt-4o-mini-transcribe",
-            file=audio_file,
-        )
+    transcript = _openai_client().audio.transcriptions.create(
+        model="gpt-4o-mini-transcribe",
+        file=audio,
+    )
     return transcript.text.strip()
 def generate_reply(session: Dict[str, Any]) -> str:
     """Call OpenAI to craft the next assistant turn."""
-    history: List[Dict[str, str]] = session["history"]
-    # Use the existing history (which already includes the initial system prompt)
-    messages = list(history)
+    turns: Deque[Dict[str, str]] = session["turns"]
+    system = session.get("system")
+    messages = [system, *turns] if system else list(turns)
 
-    completion = client.chat.completions.create(
+    completion = _openai_client().chat.completions.create(
         model="gpt-4o-mini",
         temperature=0.6,
         messages=messages,
@@ -196,6 +467,11 @@ def generate_reply(session: Dict[str, Any]) -> str:
     return completion.choices[0].message.content.strip()
 
 
+def _same_utterance(a: str, b: str) -> bool:
+    """Compare two transcripts ignoring case, punctuation and spacing."""
+    return _NON_WORD_RE.sub(" ", a).strip().lower() == _NON_WORD_RE.sub(" ", b).strip().lower()
+
+
 def recording_action_url() -> str:
     """Build an absolute callback URL Twilio can reach from the public internet."""
     path = url_for("process_recording")
@@ -273,30 +549,32 @@ def handle_voice() -> Response:
     user_id = request.args.get("user_id")
     if user_id:
         session["user_id"] = user_id
+    # Load the company profile once per call; it feeds both the system prompt and the intro.
+    ctx = session.get("company_ctx") or session.setdefault(
+        "company_ctx", _load_company_context(session.get("user_id"))
+    )
     # Inject a tailored system prompt that uses the company's name/description and assistant name
-    if not any(m.get("role") == "system" for m in session["history"]):
-        ctx = _load_company_context(session.get("user_id"))
+    if session.get("system") is None:
         sys_prompt = build_system_prompt(
             assistant_name=ctx.get("assistant_name") or "Alice",
             company_name=ctx.get("company_name") or "Jonny AI Company",
             company_profile=ctx.get("company_description") or None,
         )
-        session["history"].append({"role": "system", "content": sys_prompt})
+        session["system"] = {"role": "system", "content": sys_prompt}
     session.setdefault("prospect_number", request.form.get("To"))
     session.setdefault("twilio_number", request.form.get("From"))
-    history: List[Dict[str, str]] = session["history"]
+    turns: Deque[Dict[str, str]] = session["turns"]
     session["stage"] = "intro"
     session["decline_attempts"] = 0
 
     # Build a dynamic intro that uses the caller's company name from the user's profile
-    ctx = _load_company_context(session.get("user_id"))
     company_nm = ctx.get("company_name") or "Jonny AI Company"
     assistant_nm = ctx.get("assistant_name") or "Alice"
     intro = (
         f"Hi there, this is {assistant_nm} calling from {company_nm}. "
         "May I borrow a minute to share how we help sales teams schedule more meetings?"
     )
-    history.append({"role": "assistant", "content": intro})
+    turns.append({"role": "assistant", "content": intro})
 
     resp = VoiceResponse()
     start_gather(resp, intro, recording_action_url(), allow_barge_in=False, pre_pause=1.0)
@@ -310,7 +588,7 @@ def process_recording() -> Response:
     session = get_session(call_sid)
     session.setdefault("prospect_number", request.form.get("To"))
     session.setdefault("twilio_number", request.form.get("From"))
-    history: List[Dict[str, str]] = session["history"]
+    turns: Deque[Dict[str, str]] = session["turns"]
     speech_result = (request.form.get("SpeechResult") or "").strip()
     confidence_raw = request.form.get("Confidence")
     try:
@@ -326,87 +604,73 @@ def process_recording() -> Response:
         recording_url,
     )
     action_url = recording_action_url()
+    # Bookkeeping the reply does not depend on; run once the TwiML is on its way to Twilio
+    after_response: List[Callable[[], None]] = []
 
-    audio_path: Optional[Path] = None
+    speculative: Optional[Future] = None
     try:
         if speech_result and (
             speech_confidence is None or speech_confidence >= MINIMUM_SPEECH_CONFIDENCE
         ):
             user_text = speech_result
         elif recording_url:
-            audio_path = download_recording(recording_url)
-            user_text = transcribe_audio(audio_path)
+            if speech_result:
+                # Only used below if Whisper hears the same thing Twilio did.
+                speculative = _REPLY_EXECUTOR.submit(
+                    generate_reply,
+                    {
+                        "system": session.get("system"),
+                        # The window the deque keeps after turns.append() below
+                        "turns": [*turns, {"role": "user", "content": speech_result}][-MAX_HISTORY_TURNS:],
+                    },
+                )
+            user_text = transcribe_audio(download_recording(recording_url))
         else:
             user_text = ""
     except Exception:  # Broad catch to keep the call alive.
+        if speculative is not None:
+            speculative.cancel()
         logger.exception("Failed to process audio for call %s", call_sid)
         resp = handle_transcription_error(call_sid, "Apologies, I could not understand that.", action_url)
         return Response(str(resp), mimetype="text/xml")
-    finally:
-        if audio_path and audio_path.exists():
-            try:
-                audio_path.unlink()
-            except OSError:
-                logger.warning("Could not delete temp file %s", audio_path)
 
     if not user_text:
+        if speculative is not None:
+            speculative.cancel()
         resp = handle_transcription_error(call_sid, "I did not catch anything that time.", action_url)
         return Response(str(resp), mimetype="text/xml")
 
     logger.info("Caller (%s) said: %s", call_sid, user_text)
-    history.append({"role": "user", "content": user_text})
+    turns.append({"role": "user", "content": user_text})
 
     try:
-        assistant_reply = generate_reply(session)
+        if speculative is not None and _same_utterance(user_text, speech_result):
+            try:
+                assistant_reply = speculative.result()
+            except Exception:
+                # A failed guess shouldn't cost the turn: take the normal path instead
+                logger.warning("Speculative reply failed for call %s; regenerating", call_sid, exc_info=True)
+                assistant_reply = generate_reply(session)
+        else:
+            if speculative is not None:
+                speculative.cancel()
+            assistant_reply = generate_reply(session)
     except Exception:
         logger.exception("OpenAI generation failed for call %s", call_sid)
         resp = handle_transcription_error(call_sid, "I ran into a glitch thinking about that.", action_url)
         return Response(str(resp), mimetype="text/xml")
 
     logger.info("Assistant reply for %s: %s", call_sid, assistant_reply)
-    history.append({"role": "assistant", "content": assistant_reply})
+    turns.append({"role": "assistant", "content": assistant_reply})
 
     # Post-process assistant reply for scheduling tokens like [[BOOKED {...}]]
     try:
         original_reply_for_fallback = assistant_reply
-        booked_pattern = re.compile(r"\[\[BOOKED\s*(\{.*?\})\s*\]\]", re.DOTALL)
-
-        def _normalize_iso(dt_raw: str) -> Optional[str]:
-            """Normalize several ISO-like datetime strings into 'YYYY-MM-DD HH:MM'.
-
-            Examples supported:
-            - 2025-11-18T12:00
-            - 2025-11-18T12:00:00
-            - 2025-11-18T12:00:00Z
-            - 2025-11-18T12:00:00+02:00
-            - 2025-11-18 12:00
-            Returns None if it cannot parse a date+hour:minute pair.
-            """
-            if not dt_raw or not isinstance(dt_raw, str):
-                return None
-            # remove trailing Z
-            core = dt_raw.split("Z")[0]
-            # remove timezone offset like +02:00 or -05:00 (only after the date part)
-            if ("+" in core[10:]) or ("-" in core[10:]):
-                # split at the first + or - after the date portion
-                tz_match = re.search(r"[\+\-].+", core[10:])
-                if tz_match:
-                    core = core[:10] + core[10:].split(tz_match.group(0))[0]
-
-            # Find YYYY-MM-DD T or space HH:MM via regex
-            m = re.search(r"(\d{4}-\d{2}-\d{2})[T\s](\d{2}:\d{2})", core)
-            if m:
-                return f"{m.group(1)} {m.group(2)}"
-            # fallback: try to parse without T
-            m2 = re.search(r"(\d{4}-\d{2}-\d{2}).*(\d{2}:\d{2})", dt_raw)
-            if m2:
-                return f"{m2.group(1)} {m2.group(2)}"
-            return None
 
         def _handle_booked(match):
             raw = match.group(1)
             try:
-                payload = json.loads(raw)
+                payload = jsonio.loads(raw)
             except Exception:
                 logger.exception("Failed to parse BOOKED payload: %s", raw)
                 return ""
@@ -428,7 +692,7 @@ def process_recording() -> Response:
             entry.setdefault("call_sid", call_sid)
             # Auto-capture prospect phone from the call session if not provided in payload
             try:
-                session_phone = CALL_SESSIONS.get(call_sid, {}).get("prospect_number")
+                session_phone = session.get("prospect_number")
             except Exception:
                 session_phone = None
             if not entry.get("phone") and session_phone:
@@ -436,7 +700,7 @@ def process_recording() -> Response:
             # Try to fill missing name from recent user turns
             if not entry.get("name"):
                 try:
-                    cand = _extract_name_from_history(CALL_SESSIONS.get(call_sid, {}).get("history", []))
+                    cand = _extract_name_from_history(session["turns"])
                     if cand:
                         entry["name"] = cand
                     else:
@@ -460,10 +724,12 @@ def process_recording() -> Response:
                     entry["slot"] = adj
                     slot_to_book = adj
             ok = book_slot(entry)
+            # Either we took the slot or someone else already had; both change the open set
+            _bump_booked_version()
             if ok:
                 # Update session in-memory
                 try:
-                    register_scheduled_slot(CALL_SESSIONS[call_sid], entry["slot"])
+                    register_scheduled_slot(session, entry["slot"])
                 except Exception:
                     logger.exception("Failed to register scheduled slot in session for %s", call_sid)
 
@@ -472,106 +738,36 @@ def process_recording() -> Response:
                 email_ok = False
 
                 # No company notification email; just persist meeting slot without email metadata.
-                try:
-                    update_meeting(entry["slot"], call_sid=call_sid, updates={})
-                except Exception:
-                    logger.exception("Failed to finalize meeting record for slot %s", slot)
+                after_response.append(partial(_finalize_meeting, entry["slot"], call_sid))
 
                 return f"I have recorded that meeting for {entry['slot']}."
             else:
                 # Refresh available slots in session and suggest two alternatives immediately
-                slots_now = generate_available_slots(booked=get_booked_slots())
-                CALL_SESSIONS[call_sid]["available_slots"] = slots_now
+                slots_now = _cached_available_slots()
+                session["available_slots"] = slots_now
                 suggestions = ", ".join(slots_now[:2]) if slots_now else "another time that works for you"
                 return f"I'm sorry — that time is no longer available. How about {suggestions}?"
 
-        assistant_reply = booked_pattern.sub(lambda m: _handle_booked(m), assistant_reply)
+        # Most turns carry no booking tag; skip the regex engine for those
+        if "[[BOOKED" in assistant_reply:
+            assistant_reply = _BOOKED_RE.sub(_handle_booked, assistant_reply)
 
         # Fallback: If we still don't have a scheduled slot in session (meaning booking didn't persist),
         # try to extract a date/time from the natural language assistant reply and persist the booking.
         if not session.get("scheduled_slot"):
             try:
-                # Accept ISO-like "YYYY-MM-DDTHH:MM" or with space, and also plain date + time nearby
-                iso_match = re.search(r"(\d{4}-\d{2}-\d{2})[T\s](\d{1,2}:\d{2})", original_reply_for_fallback)
-                if not iso_match:
-                    # try separate date and time anywhere in the string as a last resort
-                    date_match = re.search(r"(\d{4}-\d{2}-\d{2})", original_reply_for_fallback)
-                    time_match = re.search(r"\b(\d{1,2}:\d{2})\b", original_reply_for_fallback)
-                else:
-                    date_match, time_match = iso_match, iso_match
-
-                slot_guess = None
-                if date_match and time_match:
-                    date_part = date_match.group(1)
-                    time_part = time_match.group(2) if time_match is iso_match else time_match.group(1)
-                    # zero-pad hour if needed
-                    if len(time_part.split(":")[0]) == 1:
-                        time_part = f"0{time_part}"
-                    slot_guess = f"{date_part} {time_part}"
-                else:
-                    # Try to infer from weekday name + time (e.g., "Tuesday at 12:00" or "Tuesday at 12 pm"). English day names supported here.
-                    lower = original_reply_for_fallback.lower()
-                    day_match = re.search(r"\b(monday|tuesday|wednesday|thursday|sunday)\b", lower)
-                    # Support HH:MM
-                    time_hhmm = re.search(r"\b(\d{1,2}:\d{2})\b", original_reply_for_fallback)
-                    # Support 12-hour with am/pm, with optional :mm
-                    time_ampm = re.search(r"\b(\d{1,2})(?::(\d{2}))?\s*(am|pm)\b", lower)
-                    # Support 'noon' and 'midnight'
-                    noon_match = re.search(r"\b(noon|midday)\b", lower)
-                    midnight_match = re.search(r"\b(midnight)\b", lower)
-
-                    if day_match and (time_hhmm or time_ampm or noon_match or midnight_match):
-                        from datetime import datetime, timedelta
-                        day_name = day_match.group(1)
-                        # Determine target time in 24h HH:MM
-                        if time_hhmm:
-                            hour_min = time_hhmm.group(1)
-                            if len(hour_min.split(":")[0]) == 1:
-                                hour_min = f"0{hour_min}"
-                        elif time_ampm:
-                            h = int(time_ampm.group(1))
-                            m = int(time_ampm.group(2) or 0)
-                            ampm = time_ampm.group(3)
-                            if ampm == "pm" and h != 12:
-                                h += 12
-                            if ampm == "am" and h == 12:
-                                h = 0
-                            hour_min = f"{h:02d}:{m:02d}"
-                        elif noon_match:
-                            hour_min = "12:00"
-                        elif midnight_match:
-                            hour_min = "00:00"
-                        else:
-                            hour_min = None
-
-                        target_wd_map = {"monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3, "sunday": 6}
-                        target_wd = target_wd_map.get(day_name)
-                        now = datetime.now()
-                        for delta in range(0, 14):
-                            candidate = now + timedelta(days=delta)
-                            if candidate.weekday() == target_wd:
-                                hh, mm = map(int, hour_min.split(":")) if hour_min else (None, None)
-                                if hh is None:
-                                    break
-                                candidate_dt = candidate.replace(hour=hh, minute=mm, second=0, microsecond=0)
-                                if candidate_dt <= now:
-                                    continue
-                                slot_guess = candidate_dt.strftime("%Y-%m-%d %H:%M")
-                                break
-
+                slot_guess, to_email = _guess_slot_from_text(original_reply_for_fallback)
                 if slot_guess and is_slot_available(slot_guess):
-                    email_match = re.search(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", original_reply_for_fallback)
-                    to_email = email_match.group(0) if email_match else None
                     entry = {
                         "slot": slot_guess,
                         "call_sid": call_sid,
                         "email": to_email,
-                        "phone": CALL_SESSIONS.get(call_sid, {}).get("prospect_number"),
+                        "phone": session.get("prospect_number"),
                         "notes": "fallback_nl_booking_inferred_from_assistant_reply",
                     }
                     # Attempt to extract name from recent user turns
                     try:
-                        cand = _extract_name_from_history(CALL_SESSIONS.get(call_sid, {}).get("history", []))
+                        cand = _extract_name_from_history(session["turns"])
                         if cand:
                             entry["name"] = cand
                         else:
@@ -579,9 +775,10 @@ def process_recording() -> Response:
                     except Exception:
                         logger.exception("Name extraction failed for call %s (fallback)", call_sid)
                     ok = book_slot(entry)
+                    _bump_booked_version()
                     if ok:
                         try:
-                            register_scheduled_slot(CALL_SESSIONS[call_sid], slot_guess)
+                            register_scheduled_slot(session, slot_guess)
                         except Exception:
                             logger.exception("Failed to register scheduled slot in session for %s (fallback)", call_sid)
 
@@ -594,17 +791,14 @@ def process_recording() -> Response:
                                 logger.exception("Failed to send confirmation email to %s (fallback)", to_email)
 
                         # Company notification removed: finalize meeting record without email fields.
-                        try:
-                            update_meeting(slot_guess, call_sid=call_sid, updates={})
-                        except Exception:
-                            logger.exception("Failed to finalize meeting record for slot %s (fallback)", slot_guess)
+                        after_response.append(partial(_finalize_meeting, slot_guess, call_sid))
 
                         suffix = f" I have recorded that meeting for {slot_guess}."
                         if to_email:
                             suffix = f" I have recorded that meeting for {slot_guess} and will email a confirmation to {to_email}."
                         assistant_reply = f"{assistant_reply}\n{suffix}".strip()
                     else:
-                        CALL_SESSIONS[call_sid]["available_slots"] = generate_available_slots(booked=get_booked_slots())
+                        session["available_slots"] = _cached_available_slots()
                         assistant_reply = f"{assistant_reply}\nThat time appears unavailable now. Let me check other times.".strip()
                 else:
                     if slot_guess:
@@ -617,21 +811,25 @@ def process_recording() -> Response:
     # Note: simplified flow — we rely on the assistant's reply content (e.g. [[END_CALL]])
     # to decide whether to end the call. No stage tracking or meeting logging here.
 
-    # Keep history manageable for long calls while preserving recent turns.
-    if len(history) > 24:
-        recent_turns = history[-23:]
-        session["history"] = [history[0]] + recent_turns
-        history = session["history"]
-
     # Guard: do not end the call prematurely if no meeting scheduled and no other wrap-up tag
     if "[[END_CALL]]" in assistant_reply:
         if not session.get("scheduled_slot") and not any(tag in assistant_reply for tag in ("[[BOOKED", "[[CALLBACK_NEEDED", "[[SEND_INFO")):
             assistant_reply = assistant_reply.replace("[[END_CALL]]", "").strip()
 
     resp = continue_conversation_twiml(assistant_reply, call_sid, action_url)
-    return Response(str(resp), mimetype="text/xml")
+    response = Response(str(resp), mimetype="text/xml")
+    for callback in after_response:
+        response.call_on_close(callback)
+    return response
 
 
 if __name__ == "__main__":
+    # Werkzeug's debug server handles one request at a time; production runs under
+    # gunicorn (see gunicorn_voice_conf.py)
+    if not os.getenv("FLASK_DEV"):
+        raise SystemExit(
+            "Set FLASK_DEV=1 to run the development server, or serve with "
+            "`gunicorn -c gunicorn_voice_conf.py voice_server:app`."
+        )
     logger.info("Voice server is running at http://localhost:5000 ...")
     app.run(host="0.0.0.0", port=5000, debug=True)